@@ -0,0 +1,551 @@
+# Functions and helpers shared by nuke_bridge.py and nuke_bridge_enhanced.py
+import sys
+import json
+import traceback
+import os
+import socket
+import stat
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+# Imported (and checked) by the bridge scripts before they import this module
+import nuke
+
+# orjson is considerably faster and emits bytes directly; fall back to the stdlib
+try:
+    import orjson
+    def _dumps(obj):
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj):
+        return json.dumps(obj).encode('utf-8')
+    _loads = json.loads
+
+def _write(result):
+    """Write a result to stdout as one line of JSON"""
+    # Let anything already printed through sys.stdout go out first
+    sys.stdout.flush()
+    sys.stdout.buffer.write(_dumps(result) + b"\n")
+    sys.stdout.flush()
+
+# Formatting a traceback walks the whole stack, so only include one when debugging
+DEBUG = bool(os.environ.get('NUKE_BRIDGE_DEBUG'))
+
+def _error(e):
+    """Error result for an unexpected exception"""
+    result = {"error": str(e)}
+    if DEBUG:
+        result["traceback"] = traceback.format_exc()
+    return result
+
+# Unix socket the `serve` daemon listens on
+SOCKET_PATH = os.environ.get('NUKE_MCP_SOCKET', '/tmp/nuke-mcp.sock')
+
+# Background renders started by execute, keyed by job id
+_jobs = {}
+
+# Set while run() answers a single command from the command line; the
+# process exits straight after, so nothing can poll a background job
+_one_shot = False
+
+# State of the batch running on this thread, if any
+_batch = threading.local()
+
+@contextmanager
+def _no_undo():
+    """Don't record undo steps for the changes made inside the block"""
+    undo = nuke.Undo()
+    if undo.disabled():
+        # Already off, e.g. inside a batch; leave it to whoever turned it off
+        yield
+        return
+    
+    undo.disable()
+    try:
+        yield
+    finally:
+        undo.enable()
+
+def _clear_selection():
+    """Deselect whatever is selected, without visiting every node in the script"""
+    for node in nuke.selectedNodes():
+        node.setSelected(False)
+
+def _to_node(name):
+    """nuke.toNode, remembered for the rest of the batch when running in one"""
+    nodes = getattr(_batch, 'nodes', None)
+    if nodes is None:
+        return nuke.toNode(name)
+    
+    node = nodes.get(name)
+    if node is None:
+        node = nuke.toNode(name)
+        if node:
+            nodes[name] = node
+    return node
+
+def create_node(args):
+    """Create a node in Nuke"""
+    try:
+        node_type = args.get('nodeType')
+        name = args.get('name')
+        inputs = args.get('inputs', [])
+        
+        if not node_type:
+            return {"error": "nodeType is required"}
+        
+        # Find the inputs first, so a bad name doesn't leave a half-connected node behind
+        input_nodes = []
+        for input_name in inputs:
+            input_node = _to_node(input_name)
+            if not input_node:
+                return {"error": f"Input node '{input_name}' not found"}
+            input_nodes.append(input_node)
+        
+        # Create the node
+        if name:
+            node = nuke.createNode(node_type, f"name {name}")
+        else:
+            node = nuke.createNode(node_type)
+        
+        # Connect inputs if provided
+        for i, input_node in enumerate(input_nodes):
+            node.setInput(i, input_node)
+        
+        return {
+            "success": True,
+            "node": {
+                "name": node.name(),
+                "type": node_type
+            }
+        }
+    except Exception as e:
+        return _error(e)
+
+def _set_array(knob, components, dimensions):
+    """Set the leading components of an array knob, in one call where possible"""
+    if len(components) == dimensions:
+        try:
+            knob.setValue(components)
+            return
+        except TypeError:
+            # This knob type only takes one component at a time
+            pass
+    
+    for i, component in enumerate(components):
+        knob.setValue(component, i)
+
+def set_knob_value(args):
+    """Set a knob value on a node"""
+    try:
+        node_name = args.get('nodeName')
+        knob_name = args.get('knobName')
+        value = args.get('value')
+        
+        if not node_name:
+            return {"error": "nodeName is required"}
+        if not knob_name:
+            return {"error": "knobName is required"}
+        if value is None:
+            return {"error": "value is required"}
+        
+        # Get the node
+        node = _to_node(node_name)
+        if not node:
+            return {"error": f"Node '{node_name}' not found"}
+        
+        # Set the knob value
+        knob = node.knob(knob_name)
+        if not knob:
+            return {"error": f"Knob '{knob_name}' not found on node '{node_name}'"}
+        
+        # Handle different value types
+        try:
+            with _no_undo():
+                # Check if this is an array knob
+                dimensions = knob.dimensions() if hasattr(knob, 'dimensions') else 1
+                if dimensions > 1:
+                    # For array knobs like color, position, etc.
+                    if isinstance(value, list) or isinstance(value, tuple):
+                        components = [float(component) for component in value[:dimensions]]
+                    else:
+                        # Single value for all dimensions
+                        components = [float(value)] * dimensions
+                    _set_array(knob, components, dimensions)
+                elif knob.Class() in ["Enumeration_Knob", "Boolean_Knob"]:
+                    # Handle enumeration knobs
+                    if isinstance(value, str):
+                        knob.setValue(value)
+                    else:
+                        knob.setValue(int(value))
+                else:
+                    # Standard knobs
+                    knob.setValue(value)
+        except Exception as e:
+            return {"error": f"Failed to set value: {str(e)}"}
+            
+        return {
+            "success": True,
+            "node": node_name,
+            "knob": knob_name,
+            "value": value
+        }
+    except Exception as e:
+        return _error(e)
+
+def get_node(args):
+    """Get information about a node"""
+    try:
+        node_name = args.get('nodeName')
+        
+        if not node_name:
+            return {"error": "nodeName is required"}
+        
+        # Get the node
+        node = _to_node(node_name)
+        if not node:
+            return {"error": f"Node '{node_name}' not found"}
+        
+        # Gather basic information about the node, limited to the requested
+        # knobs if the client only wants a few
+        wanted = args.get('knobs')
+        if wanted:
+            knobs = ((k, node.knob(k)) for k in wanted)
+        else:
+            # knobs() already maps names to knobs; don't look each one up again
+            knobs = node.knobs().items()
+        
+        knob_dict = {}
+        for k, knob in knobs:
+            if knob and knob.visible():
+                try:
+                    knob_dict[k] = knob.value()
+                except:
+                    knob_dict[k] = str(knob)
+        
+        return {
+            "success": True,
+            "node": {
+                "name": node.name(),
+                "type": node.Class(),
+                "knobs": knob_dict
+            }
+        }
+    except Exception as e:
+        return _error(e)
+
+def execute_render(args):
+    """Execute a render using a Write node"""
+    try:
+        write_node_name = args.get('writeNodeName')
+        frame_range_start = args.get('frameRangeStart')
+        frame_range_end = args.get('frameRangeEnd')
+        
+        if not write_node_name:
+            return {"error": "writeNodeName is required"}
+        if frame_range_start is None:
+            return {"error": "frameRangeStart is required"}
+        if frame_range_end is None:
+            return {"error": "frameRangeEnd is required"}
+        
+        # Get the Write node
+        write_node = nuke.toNode(write_node_name)
+        if not write_node:
+            return {"error": f"Write node '{write_node_name}' not found"}
+        
+        # Check if it's a Write node
+        if write_node.Class() != "Write":
+            return {"error": f"Node '{write_node_name}' is not a Write node"}
+        
+        if _one_shot:
+            # This process exits, and forgets its jobs, before a background
+            # render could be polled; render here instead
+            nuke.execute(write_node, int(frame_range_start), int(frame_range_end))
+            return {
+                "success": True,
+                "status": "done",
+                "writeNode": write_node_name,
+                "frameRange": {
+                    "start": frame_range_start,
+                    "end": frame_range_end
+                }
+            }
+        
+        # Render in a separate Nuke process so this one stays free for other
+        # commands; renderStatus and renderWait report on it
+        frame_ranges = nuke.FrameRanges(f"{int(frame_range_start)}-{int(frame_range_end)}")
+        process = nuke.executeBackgroundNuke(
+            nuke.EXE_PATH, [write_node], frame_ranges, nuke.views(), {"maxThreads": 0, "maxCache": 0}
+        )
+        job_id = uuid.uuid4().hex
+        _jobs[job_id] = {"process": process, "running": True, "returncode": None}
+        
+        return {
+            "success": True,
+            "jobId": job_id,
+            "writeNode": write_node_name,
+            "frameRange": {
+                "start": frame_range_start,
+                "end": frame_range_end
+            }
+        }
+    except Exception as e:
+        return _error(e)
+
+def _render_state(process):
+    """(running, returncode) of a background render; returncode may be unknown"""
+    if hasattr(process, 'poll'):
+        returncode = process.poll()
+        return returncode is None, returncode
+    
+    # Otherwise Nuke handed back the render's process id
+    if os.name == 'nt':
+        # Signal 0 isn't a probe on Windows; os.kill would end the render
+        return None, None
+    try:
+        # Collects the exit status if the render is a child of this process
+        pid, status = os.waitpid(process, os.WNOHANG)
+        if pid:
+            # Same convention as subprocess: negative for a fatal signal
+            if os.WIFEXITED(status):
+                return False, os.WEXITSTATUS(status)
+            return False, -os.WTERMSIG(status)
+        return True, None
+    except ChildProcessError:
+        pass
+    
+    try:
+        os.kill(process, 0)
+    except ProcessLookupError:
+        return False, None
+    except PermissionError:
+        return True, None
+    return True, None
+
+def _render_status(job_id):
+    job = _jobs.get(job_id)
+    if job is None:
+        return {"error": f"Render job '{job_id}' not found"}
+    
+    process = job["process"]
+    if job["running"] is False:
+        # Finished and already reaped; don't ask the OS again
+        running, returncode = False, job["returncode"]
+    else:
+        running, returncode = _render_state(process)
+        job["running"], job["returncode"] = running, returncode
+    status = {None: "unknown", True: "running", False: "done"}[running]
+    result = {
+        "success": True,
+        "jobId": job_id,
+        "pid": getattr(process, 'pid', process),
+        "status": status
+    }
+    if returncode is not None:
+        result["returncode"] = returncode
+    return result
+
+def render_status(args):
+    """Report on a render started by execute"""
+    try:
+        job_id = args.get('jobId')
+        
+        if not job_id:
+            return {"error": "jobId is required"}
+        
+        return _render_status(job_id)
+    except Exception as e:
+        return _error(e)
+
+def render_wait(args):
+    """Block until a render started by execute finishes, or the timeout passes"""
+    try:
+        job_id = args.get('jobId')
+        timeout = args.get('timeout')
+        
+        if not job_id:
+            return {"error": "jobId is required"}
+        
+        deadline = None if timeout is None else time.monotonic() + float(timeout)
+        while True:
+            result = _render_status(job_id)
+            if result.get("status") != "running":
+                return result
+            if deadline is not None and time.monotonic() >= deadline:
+                result["timedOut"] = True
+                return result
+            time.sleep(0.5)
+    except Exception as e:
+        return _error(e)
+
+# Commands every bridge supports
+COMMANDS_BASE = {
+    "createNode": create_node,
+    "setKnobValue": set_knob_value,
+    "getNode": get_node,
+    "execute": execute_render,
+    "renderStatus": render_status,
+    "renderWait": render_wait,
+}
+
+def _messages(result):
+    """The response messages for a result. Streaming commands (listNodes with
+    stream) return an iterator of messages instead of a single dict."""
+    if isinstance(result, dict):
+        yield result
+        return
+    
+    try:
+        yield from result
+    except Exception as e:
+        yield _error(e)
+
+def _serve_connection(conn, commands):
+    """Answer newline-delimited JSON commands on one connection until it closes"""
+    for line in conn.makefile('rb'):
+        if not line.strip():
+            continue
+        
+        message = {}
+        try:
+            message = _loads(line)
+            if not isinstance(message, dict):
+                message = {}
+                raise ValueError("message must be an object")
+        except ValueError as e:
+            result = {"error": f"Invalid JSON message: {str(e)}"}
+        else:
+            handler = commands.get(message.get('command'))
+            if handler:
+                try:
+                    result = handler(message.get('args', {}))
+                except Exception as e:
+                    result = _error(e)
+            else:
+                result = {"error": f"Unknown command: {message.get('command')}"}
+        
+        for response in _messages(result):
+            # Let the client match responses to requests
+            if 'id' in message:
+                response["id"] = message['id']
+            conn.sendall(_dumps(response) + b"\n")
+
+def _stale_socket_problem(path):
+    """Remove a socket a previous daemon left at path, if any.
+    
+    Returns why serve can't use path instead, if something else is there: a
+    file that isn't a socket, or a daemon that is still serving on it.
+    """
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return None
+    if not stat.S_ISSOCK(mode):
+        return f"{path} exists and is not a socket"
+    
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    # A live daemon busy with another client may not accept straight away
+    probe.settimeout(1.0)
+    try:
+        probe.connect(path)
+    except ConnectionRefusedError:
+        # Nothing listening; the daemon that made it is gone
+        os.unlink(path)
+        return None
+    except OSError as e:
+        return f"Can't check the socket at {path}: {e}"
+    finally:
+        probe.close()
+    return f"Already serving on {path}"
+
+def serve(commands, path=SOCKET_PATH):
+    """Keep this Nuke session running and answer commands on a Unix socket.
+    
+    Importing nuke takes seconds, so clients that send many commands should
+    start `nuke -t <bridge> serve` once and reconnect to it, rather than
+    launching a fresh process for every command.
+    """
+    if not hasattr(socket, 'AF_UNIX'):
+        _write({"error": "serve needs Unix domain socket support"})
+        return
+    
+    # A socket file left behind by a previous daemon would make bind fail
+    problem = _stale_socket_problem(path)
+    if problem:
+        _write({"error": problem})
+        return
+    
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        server.bind(path)
+    except OSError as e:
+        server.close()
+        _write(_error(e))
+        return
+    
+    try:
+        server.listen(1)
+        print(f"Serving Nuke bridge commands on {path}", file=sys.stderr)
+        
+        while True:
+            conn, _ = server.accept()
+            try:
+                _serve_connection(conn, commands)
+            except OSError as e:
+                print(f"Client connection error: {e}", file=sys.stderr)
+            finally:
+                conn.close()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        if os.path.exists(path):
+            os.unlink(path)
+
+def run(commands):
+    """Run the command named on the command line, or serve commands, using the given command table"""
+    global _one_shot
+    if len(sys.argv) < 2:
+        _write({"error": "No command specified"})
+        return
+    
+    command = sys.argv[1]
+    
+    # Long-lived mode: stay up and answer commands over a socket
+    if command == "serve":
+        serve(commands, sys.argv[2] if len(sys.argv) > 2 else SOCKET_PATH)
+        return
+    
+    # Parse arguments. Passing "-" reads them from stdin instead, which avoids
+    # shell quoting and the command line length limit for large payloads.
+    # stdin is only read when asked for: a caller that leaves it open would
+    # otherwise hang waiting for EOF.
+    args = {}
+    if len(sys.argv) > 2:
+        raw = sys.argv[2]
+        if raw == "-":
+            raw = sys.stdin.buffer.read()
+    else:
+        raw = None
+    
+    if raw and raw.strip():
+        try:
+            args = _loads(raw)
+        except ValueError:
+            _write({"error": "Invalid JSON arguments"})
+            return
+    
+    _one_shot = True
+    
+    handler = commands.get(command)
+    if handler:
+        result = handler(args)
+    else:
+        result = {"error": f"Unknown command: {command}"}
+    
+    # Print the result as JSON, one line per message
+    for response in _messages(result):
+        _write(response)
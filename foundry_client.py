@@ -1,17 +1,83 @@
 #!/usr/bin/env python3
 import socket
+import errno
 import json
 import sys
+import struct
+import atexit
+import threading
+from collections import defaultdict, deque
+
+# orjson is considerably faster and works on bytes directly; fall back to the stdlib
+try:
+    import orjson
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj):
+        return json.dumps(obj).encode('utf-8')
+    _loads = json.loads
+
+# MessagePack is more compact and quicker to decode than JSON; it is optional on both ends
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Every message on the wire is a 4-byte big-endian payload length and a
+# 1-byte payload format, followed by the payload
+FRAME_HEADER = struct.Struct('>IB')
+FORMAT_JSON = 0
+FORMAT_MSGPACK = 1
+
+# (encode, decode) pairs for each payload format this side understands
+CODECS = {FORMAT_JSON: (_dumps, _loads)}
+if msgpack is not None:
+    CODECS[FORMAT_MSGPACK] = (
+        lambda obj: msgpack.packb(obj, use_bin_type=True),
+        lambda data: msgpack.unpackb(data, raw=False),
+    )
+
+def _is_connection_lost(error):
+    """Whether an exception means the bridge connection itself went away"""
+    if isinstance(error, (ConnectionError, BrokenPipeError)):
+        return True
+    return isinstance(error, OSError) and error.errno in (errno.EPIPE, errno.ECONNRESET)
 
 class FoundryNukeClient:
+    # Idle connections shared by every client, keyed by (host, port).
+    # Sockets are pushed and popped from the right so the most recently
+    # used (and therefore most likely still alive) one is reused first.
+    _pool = defaultdict(deque)
+    # deque push/pop is atomic on its own, but creating a key's deque and
+    # clearing the pool are not without the GIL (free-threaded builds)
+    _pool_lock = threading.Lock()
+    
     def __init__(self, host='127.0.0.1', port=8765):
         self.host = host
         self.port = port
         self.socket = None
+        # Preferred payload format; drops back to JSON if the bridge can't read it
+        self._set_wire_format(FORMAT_MSGPACK if FORMAT_MSGPACK in CODECS else FORMAT_JSON)
+        # Receive buffer reused across responses; grown when a larger one arrives
+        self._buffer = bytearray(65536)
+    
+    def _set_wire_format(self, fmt):
+        # Keep the codec functions bound on the instance so sends don't look them up
+        self.wire_format = fmt
+        self._encode, self._decode = CODECS[fmt]
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, tb):
+        self._release()
+        return False
     
     def connect(self):
         try:
             self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
             self.socket.connect((self.host, self.port))
             print(f"Connected to Foundry Nuke bridge at {self.host}:{self.port}")
             return True
@@ -24,30 +90,163 @@ class FoundryNukeClient:
             self.socket.close()
             self.socket = None
     
+    def _idle(self):
+        """The deque of idle connections to this client's bridge"""
+        with self._pool_lock:
+            return self._pool[(self.host, self.port)]
+    
+    def _acquire(self):
+        """Reuse a pooled connection if one is idle, otherwise open a new one"""
+        if self.socket:
+            return True
+        
+        try:
+            self.socket = self._idle().pop()
+            return True
+        except IndexError:
+            return self.connect()
+    
+    def _release(self):
+        """Hand the current connection back to the pool for the next command"""
+        if self.socket:
+            self._idle().append(self.socket)
+            self.socket = None
+    
+    @classmethod
+    def close_all(cls):
+        """Close every pooled connection"""
+        with cls._pool_lock:
+            pools = list(cls._pool.values())
+            cls._pool.clear()
+        
+        for idle in pools:
+            while idle:
+                try:
+                    idle.pop().close()
+                except Exception:
+                    pass
+    
+    def _send_frame(self, fmt, payload):
+        self.socket.sendall(FRAME_HEADER.pack(len(payload), fmt) + payload)
+    
+    def _recv_exactly(self, size):
+        """Fill the first `size` bytes of the receive buffer from the socket"""
+        if size > len(self._buffer):
+            self._buffer = bytearray(size)
+        view = memoryview(self._buffer)[:size]
+        recv_into = self.socket.recv_into
+        while view:
+            received = recv_into(view)
+            if not received:
+                raise ConnectionError("Connection closed by Foundry Nuke bridge")
+            view = view[received:]
+    
+    def _recv_frame(self):
+        self._recv_exactly(FRAME_HEADER.size)
+        size, fmt = FRAME_HEADER.unpack_from(self._buffer)
+        self._recv_exactly(size)
+        return fmt, self._buffer[:size]
+    
+    def _roundtrip(self, command):
+        # Send the command
+        wire_format = self.wire_format
+        self._send_frame(wire_format, self._encode(command))
+        
+        # Receive the response
+        fmt, payload = self._recv_frame()
+        result = self._decode(payload) if fmt == wire_format else CODECS[fmt][1](payload)
+        
+        if fmt != wire_format:
+            # The bridge can't read our preferred format and answered in JSON;
+            # switch to JSON and resend
+            self._set_wire_format(FORMAT_JSON)
+            return self._roundtrip(command)
+        return result
+    
     def send_command(self, command_type, args=None):
         if args is None:
             args = {}
         
-        if not self.socket:
-            if not self.connect():
-                return {"error": "Not connected to Foundry Nuke bridge"}
-        
         command = {
             "type": command_type,
             "args": args
         }
         
+        # A pooled connection may have been dropped by the bridge since it was
+        # last used, so reconnect and try once more if the connection is lost
+        for attempt in range(2):
+            if not self._acquire():
+                return {"error": "Not connected to Foundry Nuke bridge"}
+            
+            try:
+                result = self._roundtrip(command)
+                self._release()
+                return result
+            except ValueError as e:
+                # The whole frame was read, so the connection is still usable
+                print(f"Error decoding response: {e}")
+                self._release()
+                return {"error": str(e)}
+            except socket.timeout as e:
+                # The late response would be read as the answer to the next
+                # command, so this connection can't be reused
+                print(f"Timed out waiting for response: {e}")
+                self.disconnect()
+                return {"error": str(e)}
+            except Exception as e:
+                self.disconnect()
+                if attempt == 0 and _is_connection_lost(e):
+                    print(f"Connection lost ({e}), reconnecting")
+                    continue
+                print(f"Error sending command: {e}")
+                return {"error": str(e)}
+    
+    def send_many(self, commands):
+        """Pipeline several {"type", "args"} commands over a single connection.
+        
+        Every command is written before any response is read, so the whole
+        batch costs a single round trip. The bridge still runs the commands in
+        order and echoes each one's id back with its response.
+        """
+        commands = list(commands)
+        if not self._acquire():
+            return [{"error": "Not connected to Foundry Nuke bridge"} for _ in commands]
+        
+        wire_format = self.wire_format
+        results = [None] * len(commands)
+        fall_back = False
         try:
-            # Send the command
-            self.socket.sendall(json.dumps(command).encode('utf-8'))
+            for request_id, command in enumerate(commands):
+                self._send_frame(wire_format, self._encode({
+                    "id": request_id,
+                    "type": command.get("type"),
+                    "args": command.get("args", {})
+                }))
             
-            # Receive the response
-            response = self.socket.recv(8192).decode('utf-8')
-            return json.loads(response)
+            for _ in commands:
+                fmt, payload = self._recv_frame()
+                if fmt != wire_format:
+                    # The bridge can't read our preferred format (see _roundtrip)
+                    fall_back = True
+                    continue
+                result = self._decode(payload)
+                request_id = result.pop("id", None) if isinstance(result, dict) else None
+                if not isinstance(request_id, int) or not 0 <= request_id < len(results) or results[request_id] is not None:
+                    # An error the bridge couldn't tie to a command (e.g. one it
+                    # couldn't decode); responses come back in order, so it
+                    # belongs to the first command still unanswered
+                    request_id = results.index(None)
+                results[request_id] = result
+            self._release()
         except Exception as e:
-            print(f"Error sending command: {e}")
+            print(f"Error sending commands: {e}")
             self.disconnect()
-            return {"error": str(e)}
+            return [{"error": str(e)} for _ in commands]
+        
+        if fall_back:
+            self._set_wire_format(FORMAT_JSON)
+            return self.send_many(commands)
+        return results
     
     def create_node(self, node_type, name=None):
         args = {
@@ -67,6 +266,14 @@ class FoundryNukeClient:
         
         return self.send_command("setKnobValue", args)
     
+    def set_knobs_values(self, node_name, knobs):
+        args = {
+            "nodeName": node_name,
+            "knobs": knobs
+        }
+        
+        return self.send_command("setKnobsValues", args)
+    
     def get_node(self, node_name):
         args = {
             "nodeName": node_name
@@ -82,6 +289,15 @@ class FoundryNukeClient:
         }
         
         return self.send_command("execute", args)
+    
+    def get_job_status(self, job_id):
+        args = {
+            "jobId": job_id
+        }
+        
+        return self.send_command("getJobStatus", args)
+
+atexit.register(FoundryNukeClient.close_all)
 
 # Example usage
 if __name__ == "__main__":
@@ -94,6 +310,7 @@ if __name__ == "__main__":
         print("  set [node_name] [knob_name] [value]")
         print("  get [node_name]")
         print("  render [write_node_name] [frame_start] [frame_end]")
+        print("  status [job_id]")
         sys.exit(1)
     
     command = sys.argv[1]
@@ -152,6 +369,16 @@ if __name__ == "__main__":
         result = client.execute_render(write_node_name, frame_start, frame_end)
         print(json.dumps(result, indent=2))
     
+    elif command == "status":
+        if len(sys.argv) < 3:
+            print("Usage: python foundry_client.py status [job_id]")
+            sys.exit(1)
+        
+        job_id = sys.argv[2]
+        
+        result = client.get_job_status(job_id)
+        print(json.dumps(result, indent=2))
+    
     else:
         print(f"Unknown command: {command}")
         sys.exit(1)
@@ -3,83 +3,270 @@
 import os
 import socket
 import threading
+import asyncio
+import struct
 import json
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
 import sys
-import nuke
-import nukescripts
 
 # This script must be loaded within Foundry's Nuke application
-# We use a different module name to avoid confusion with any folder deletion tool
 try:
     # This import will only work when running inside Foundry's Nuke
-    import nukescripts
-    # Reference to the actual Foundry Nuke module 
-    # (using a different name to avoid confusion with any deletion package)
-    from nuke import *  # Import Nuke's contents but avoid the name conflict
+    import nuke
     print("Successfully connected to Foundry's Nuke")
 except ImportError:
     print("ERROR: This script must be run from within Foundry Nuke's Python environment.")
     print("Run this script from the Script Editor inside Foundry Nuke.")
     sys.exit(1)
 
+# orjson is considerably faster and works on bytes directly; fall back to the stdlib
+try:
+    import orjson
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj):
+        return json.dumps(obj).encode('utf-8')
+    def _loads(data):
+        # The stdlib parser won't take the receive buffer's memoryview, so
+        # decode it straight to text in one pass rather than copying it to
+        # bytes for json to decode again
+        return json.loads(str(data, 'utf-8'))
+
+# MessagePack is more compact and quicker to decode than JSON; it is optional on both ends
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Every message on the wire is a 4-byte big-endian payload length and a
+# 1-byte payload format, followed by the payload
+FRAME_HEADER = struct.Struct('>IB')
+FORMAT_JSON = 0
+FORMAT_MSGPACK = 1
+
+# (encode, decode) pairs for each payload format this side understands
+CODECS = {FORMAT_JSON: (_dumps, _loads)}
+if msgpack is not None:
+    CODECS[FORMAT_MSGPACK] = (
+        lambda obj: msgpack.packb(obj, use_bin_type=True),
+        lambda data: msgpack.unpackb(data, raw=False),
+    )
+
+# Free-threaded builds (Python 3.13+, PEP 703) run the executor threads that
+# decode, dispatch and encode commands truly in parallel
+GIL_ENABLED = getattr(sys, '_is_gil_enabled', lambda: True)()
+
+# Kernel send/receive buffer size for the bridge sockets
+SOCKET_BUFFER_SIZE = 1 << 20
+
+# Initial size of each connection's receive buffer; grown for larger commands
+RECV_BUFFER_SIZE = 1 << 16
+
 # Create a TCP server to receive commands
 class FoundryNukeBridge(threading.Thread):
-    def __init__(self, host='127.0.0.1', port=8765):
+    def __init__(self, host='127.0.0.1', port=8765, reuse_port=False, max_workers=16):
         threading.Thread.__init__(self)
         self.host = host
         self.port = port
         self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._set_buffer_sizes(self.server)
+        if reuse_port:
+            # Lets several acceptors share the port. Off by default: it would also let
+            # a second Nuke session bind 8765 silently and receive half the clients.
+            try:
+                self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            except (AttributeError, OSError) as e:
+                print(f"[FoundryNukeBridge] SO_REUSEPORT not available: {e}")
+        self.loop = None
+        # Task accepting new clients, and the tasks handling connected ones
+        self._server = None
+        self._clients = set()
+        # Threads that wait on executeInMainThreadWithResult for the handlers.
+        # Bounded, so a burst of clients can't pile up an unbounded number of them.
+        self.max_workers = max_workers
+        self._pool = None
+        # Renders queued by execute, keyed by job id
+        self._jobs = {}
+        self._jobs_lock = threading.Lock()
         self.running = False
+        # Command type -> handler, built once rather than matched per command
+        self._dispatch = {
+            'createNode': self.create_node,
+            'setKnobValue': self.set_knob_value,
+            'setKnobsValues': self.set_knobs_values,
+            'getNode': self.get_node,
+            'execute': self.execute_render,
+            'getJobStatus': self.get_job_status,
+        }
+    
+    @staticmethod
+    def _set_buffer_sizes(sock):
+        # Large enough that a big getNode response goes out in one go
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER_SIZE)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER_SIZE)
     
     def run(self):
+        # All client I/O is multiplexed on one event loop living in this
+        # thread, so Nuke's main thread stays free for executeInMainThread
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                        thread_name_prefix='FoundryNukeBridge')
+        self.loop.set_default_executor(self._pool)
+        
         self.server.bind((self.host, self.port))
         self.server.listen(1)
+        self.server.setblocking(False)
+        self._server = self.loop.create_task(self._serve())
         self.running = True
         print(f"[FoundryNukeBridge] Server started on {self.host}:{self.port}")
+        if not GIL_ENABLED:
+            print("[FoundryNukeBridge] Running without the GIL; handlers run in parallel")
         
-        while self.running:
+        try:
+            self.loop.run_forever()
+        finally:
+            # Stop accepting and cancel the handlers of clients that are still connected
+            pending = asyncio.all_tasks(self.loop)
+            for task in pending:
+                task.cancel()
+            self.loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            self.loop.close()
+            self.server.close()
+            
+            # Don't wait for handlers stuck behind a busy main thread
             try:
-                client, address = self.server.accept()
-                print(f"[FoundryNukeBridge] Client connected: {address}")
-                
-                # Handle client in a separate thread
-                client_thread = threading.Thread(target=self.handle_client, args=(client,))
-                client_thread.daemon = True
-                client_thread.start()
-                
-            except Exception as e:
-                if self.running:
-                    print(f"[FoundryNukeBridge] Error accepting connection: {e}")
+                self._pool.shutdown(wait=False, cancel_futures=True)
+            except TypeError:
+                # cancel_futures needs Python 3.9+
+                self._pool.shutdown(wait=False)
     
-    def handle_client(self, client):
+    async def _serve(self):
+        while True:
+            client, address = await self.loop.sock_accept(self.server)
+            task = self.loop.create_task(self._handle(client, address))
+            # Keep a reference so the handler isn't collected while it runs
+            self._clients.add(task)
+            task.add_done_callback(self._clients.discard)
+    
+    async def _handle(self, client, address):
+        print(f"[FoundryNukeBridge] Client connected: {address}")
+        
+        # Responses are small and latency-bound, so don't let Nagle hold them back
+        client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        client.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        self._set_buffer_sizes(client)
+        
+        # Bind everything the per-message loop touches once, up front
+        loop = self.loop
+        sock_recv_into = loop.sock_recv_into
+        sock_sendall = loop.sock_sendall
+        header_size = FRAME_HEADER.size
+        pack_header = FRAME_HEADER.pack
+        unpack_header = FRAME_HEADER.unpack_from
+        run_in_executor = loop.run_in_executor
+        process_command = self.process_command
+        
+        # Every frame is read into this one buffer, so steady-state reads
+        # allocate nothing. Commands are decoded before the next frame is read.
+        buffer = bytearray(RECV_BUFFER_SIZE)
+        view = memoryview(buffer)
+        
+        async def recv_exactly(size):
+            nonlocal buffer, view
+            if size > len(buffer):
+                buffer = bytearray(size)
+                view = memoryview(buffer)
+            received = 0
+            while received < size:
+                count = await sock_recv_into(client, view[received:size])
+                if not count:
+                    raise ConnectionError("Connection closed by client")
+                received += count
+            return view[:size]
+        
+        # Commands are queued and answered one at a time, in the order they
+        # arrived, while this coroutine keeps reading. A client can therefore
+        # pipeline many commands without waiting for each response.
+        pending = asyncio.Queue()
+        
+        async def send(fmt, response):
+            await sock_sendall(client, pack_header(len(response), fmt) + response)
+        
+        async def respond(command, fmt):
+            encode = CODECS[fmt][0]
+            try:
+                # The handlers block on executeInMainThread, so run them off the loop
+                result = await run_in_executor(None, process_command, command)
+            except Exception as e:
+                result = {"error": str(e)}
+            
+            if 'id' in command:
+                result["id"] = command['id']
+            print(f"[FoundryNukeBridge] Sending response: {result}")
+            
+            # Send the result back in the format the command arrived in
+            try:
+                response = encode(result)
+            except Exception as e:
+                response = encode({"error": str(e), "id": command.get('id')})
+            await send(fmt, response)
+        
+        async def work():
+            while True:
+                item = await pending.get()
+                if item is None:
+                    return
+                
+                # Either a command to run or an already encoded error for a bad frame
+                fmt, command, response = item
+                if command is not None:
+                    await respond(command, fmt)
+                else:
+                    await send(fmt, response)
+        
+        worker = loop.create_task(work())
+        
         try:
             while self.running:
-                data = client.recv(4096)
-                if not data:
+                try:
+                    size, fmt = unpack_header(await recv_exactly(header_size))
+                    data = await recv_exactly(size)
+                except ConnectionError:
                     break
                 
+                if fmt not in CODECS:
+                    # Answer in JSON, which every client can read, so the client can fall back to it
+                    error = _dumps({"error": f"Unsupported message format: {fmt}"})
+                    pending.put_nowait((FORMAT_JSON, None, error))
+                    continue
+                
+                # Parse the command
+                print(f"[FoundryNukeBridge] Received {size} bytes")
                 try:
-                    # Parse the command
-                    print(f"[FoundryNukeBridge] Received data: {data.decode('utf-8')}")
-                    command = json.loads(data.decode('utf-8'))
-                    result = self.process_command(command)
-                    print(f"[FoundryNukeBridge] Sending response: {json.dumps(result)}")
-                    
-                    # Send the result back
-                    response = json.dumps(result).encode('utf-8')
-                    client.sendall(response)
-                    
-                except json.JSONDecodeError as e:
-                    error_response = json.dumps({"error": f"Invalid JSON: {str(e)}"}).encode('utf-8')
-                    client.sendall(error_response)
-                except Exception as e:
-                    error_response = json.dumps({"error": str(e)}).encode('utf-8')
-                    client.sendall(error_response)
+                    command = CODECS[fmt][1](data)
+                    if not isinstance(command, dict):
+                        raise ValueError("command must be an object")
+                except ValueError as e:
+                    error = CODECS[fmt][0]({"error": f"Invalid message: {str(e)}"})
+                    pending.put_nowait((fmt, None, error))
+                    continue
+                
+                pending.put_nowait((fmt, command, None))
+            
+            # Let the commands that already arrived finish before hanging up
+            pending.put_nowait(None)
+            await worker
         
+        except asyncio.CancelledError:
+            pass
         except Exception as e:
             print(f"[FoundryNukeBridge] Client handling error: {e}")
         finally:
+            worker.cancel()
             print("[FoundryNukeBridge] Client disconnected")
             client.close()
     
@@ -88,16 +275,18 @@ class FoundryNukeBridge(threading.Thread):
         cmd_type = command.get('type')
         args = command.get('args', {})
         
-        if cmd_type == 'createNode':
-            return self.create_node(args)
-        elif cmd_type == 'setKnobValue':
-            return self.set_knob_value(args)
-        elif cmd_type == 'getNode':
-            return self.get_node(args)
-        elif cmd_type == 'execute':
-            return self.execute_render(args)
-        else:
+        handler = self._dispatch.get(cmd_type)
+        if handler is None:
             return {"error": f"Unknown command type: {cmd_type}"}
+        return handler(args)
+    
+    @staticmethod
+    def _run_on_main(fn):
+        """Run fn on Nuke's main thread and return its result"""
+        if threading.current_thread() is threading.main_thread():
+            # Already there (e.g. called from the Script Editor); no need to queue
+            return fn()
+        return nuke.executeInMainThreadWithResult(fn)
     
     def create_node(self, args):
         try:
@@ -118,9 +307,7 @@ class FoundryNukeBridge(threading.Thread):
                 except Exception as e:
                     return {"error": f"Failed to create node: {str(e)}"}
             
-            result = nuke.executeInMainThread(_create)
-            if result is None:
-                result = {"success": True, "message": "Node created successfully"}
+            result = self._run_on_main(_create)
             print(f"[FoundryNukeBridge] Create node result: {result}")
             return result
             
@@ -155,13 +342,48 @@ class FoundryNukeBridge(threading.Thread):
                 except Exception as e:
                     return {"error": f"Failed to set knob value: {str(e)}"}
             
-            result = nuke.executeInMainThread(_set_value)
+            result = self._run_on_main(_set_value)
             print(f"[FoundryNukeBridge] Set knob result: {result}")
             return result
             
         except Exception as e:
             return {"error": str(e)}
     
+    def set_knobs_values(self, args):
+        try:
+            node_name = args.get('nodeName')
+            knobs = args.get('knobs')
+            
+            if not node_name:
+                return {"error": "nodeName is required"}
+            if not knobs:
+                return {"error": "knobs is required"}
+            
+            # Set every knob in a single main thread call
+            def _set_values():
+                try:
+                    node = nuke.toNode(node_name)
+                    if not node:
+                        return {"error": f"Node '{node_name}' not found"}
+                    
+                    node_knobs = node.knobs()
+                    missing = [k for k in knobs if k not in node_knobs]
+                    if missing:
+                        return {"error": f"Knobs {missing} not found on node '{node_name}'"}
+                    
+                    for knob_name, value in knobs.items():
+                        node_knobs[knob_name].setValue(value)
+                    return {"success": True, "node": node_name, "knobs": knobs}
+                except Exception as e:
+                    return {"error": f"Failed to set knob values: {str(e)}"}
+            
+            result = self._run_on_main(_set_values)
+            print(f"[FoundryNukeBridge] Set knobs result: {result}")
+            return result
+            
+        except Exception as e:
+            return {"error": str(e)}
+    
     def get_node(self, args):
         try:
             node_name = args.get('nodeName')
@@ -183,10 +405,14 @@ class FoundryNukeBridge(threading.Thread):
                         "knobs": {}
                     }
                     
-                    # Get knob values
-                    for k in node.knobs():
-                        knob = node.knob(k)
-                        if knob.visible():
+                    # Get knob values. knobs() already maps names to knobs, so
+                    # there's no need to look each one up again with node.knob()
+                    knob_items = [(k, knob) for k, knob in node.knobs().items() if knob.visible()]
+                    try:
+                        info["knobs"] = {k: knob.value() for k, knob in knob_items}
+                    except:
+                        # Some knob can't report a value; fall back to one at a time
+                        for k, knob in knob_items:
                             try:
                                 info["knobs"][k] = knob.value()
                             except:
@@ -196,9 +422,7 @@ class FoundryNukeBridge(threading.Thread):
                 except Exception as e:
                     return {"error": f"Failed to get node info: {str(e)}"}
             
-            result = nuke.executeInMainThread(_get_node)
-            if result is None:
-                result = {"error": "Failed to get node info"}
+            result = self._run_on_main(_get_node)
             print(f"[FoundryNukeBridge] Get node result: {result}")
             return result
             
@@ -218,39 +442,83 @@ class FoundryNukeBridge(threading.Thread):
             if frame_range_end is None:
                 return {"error": "frameRangeEnd is required"}
             
+            def _check():
+                write_node = nuke.toNode(write_node_name)
+                if not write_node:
+                    return {"error": f"Write node '{write_node_name}' not found"}
+                
+                if write_node.Class() != "Write":
+                    return {"error": f"Node '{write_node_name}' is not a Write node"}
+                return None
+            
             def _execute():
+                if not future.set_running_or_notify_cancel():
+                    return
                 try:
-                    write_node = nuke.toNode(write_node_name)
-                    if not write_node:
-                        return {"error": f"Write node '{write_node_name}' not found"}
-                    
-                    if write_node.Class() != "Write":
-                        return {"error": f"Node '{write_node_name}' is not a Write node"}
+                    error = _check()
+                    if error:
+                        future.set_result(error)
+                        return
                     
                     nuke.execute(write_node_name, int(frame_range_start), int(frame_range_end))
-                    return {
+                    future.set_result({
                         "success": True,
                         "writeNode": write_node_name,
                         "frameRange": {"start": frame_range_start, "end": frame_range_end}
-                    }
+                    })
                 except Exception as e:
-                    return {"error": f"Failed to execute render: {str(e)}"}
+                    future.set_result({"error": f"Failed to execute render: {str(e)}"})
+            
+            # Report a bad node straight away rather than through the job
+            error = self._run_on_main(_check)
+            if error:
+                return error
             
-            result = nuke.executeInMainThread(_execute)
+            # Renders can take minutes; queue it on the main thread and hand back
+            # a job id to poll with getJobStatus instead of holding this handler
+            job_id = uuid.uuid4().hex
+            future = Future()
+            with self._jobs_lock:
+                self._jobs[job_id] = future
+            nuke.executeInMainThread(_execute)
+            
+            result = {
+                "success": True,
+                "jobId": job_id,
+                "writeNode": write_node_name,
+                "frameRange": {"start": frame_range_start, "end": frame_range_end}
+            }
             print(f"[FoundryNukeBridge] Execute result: {result}")
             return result
             
         except Exception as e:
             return {"error": str(e)}
     
+    def get_job_status(self, args):
+        job_id = args.get('jobId')
+        
+        if not job_id:
+            return {"error": "jobId is required"}
+        
+        with self._jobs_lock:
+            future = self._jobs.get(job_id)
+            if future is None:
+                return {"error": f"Job '{job_id}' not found"}
+            
+            if not future.done():
+                status = "running" if future.running() else "queued"
+                return {"success": True, "jobId": job_id, "status": status}
+            
+            # Finished jobs are forgotten once their result has been collected
+            del self._jobs[job_id]
+        
+        return {"success": True, "jobId": job_id, "status": "done", "result": future.result()}
+    
     def stop(self):
         self.running = False
-        try:
-            # Connect to ourselves to break the accept() call
-            socket.socket(socket.AF_INET, socket.SOCK_STREAM).connect((self.host, self.port))
-            self.server.close()
-        except:
-            pass
+        if self.loop is not None:
+            # Closing the server and stopping the loop must happen on the loop's own thread
+            self.loop.call_soon_threadsafe(self.loop.stop)
 
 # Global server instance
 _foundry_bridge = None
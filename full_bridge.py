@@ -1,5 +1,6 @@
 import sys
 import os
+import shutil
 
 # Define the base scripts directory
 SCRIPTS_BASE_DIR = 'path/to/nuke-mcp'
@@ -12,23 +13,19 @@ script_dir = os.path.join(os.path.expanduser("~"), ".nuke", "scripts")
 if not os.path.exists(script_dir):
     os.makedirs(script_dir)
 
-# Copy the provided bridge scripts to the .nuke/scripts directory
-with open(os.path.join(script_dir, "nuke_bridge_enhanced.py"), "w") as f:
-    with open(os.path.join(SCRIPTS_BASE_DIR, 'nuke_bridge_enhanced.py'), 'r') as src:
-        f.write(src.read())
-
-with open(os.path.join(script_dir, "nuke_bridge_vfx.py"), "w") as f:
-    with open(os.path.join(SCRIPTS_BASE_DIR, 'nuke_bridge_vfx.py'), 'r') as src:
-        f.write(src.read())
-
-with open(os.path.join(script_dir, "nuke_bridge_server.py"), "w") as f:
-    with open(os.path.join(SCRIPTS_BASE_DIR, 'nuke_bridge_server.py'), 'r') as src:
-        f.write(src.read())
+# Copy the provided bridge scripts to the .nuke/scripts directory,
+# skipping any that are already up to date
+for script_name in ("_bridge_core.py", "nuke_bridge_enhanced.py", "nuke_bridge_vfx.py", "nuke_bridge_server.py"):
+    src = os.path.join(SCRIPTS_BASE_DIR, script_name)
+    dst = os.path.join(script_dir, script_name)
+    if os.path.exists(dst) and os.path.getmtime(src) <= os.path.getmtime(dst):
+        continue
+    shutil.copyfile(src, dst)
 
 # First import each module
 try:
+    import _bridge_core
     import nuke_bridge_enhanced
-    import nuke_bridge_vfx
     import nuke_bridge_server
     print("Bridge modules imported")
 except ImportError as e:
@@ -47,8 +44,12 @@ except:
 # Reload all modules
 import importlib
 try:
+    # The shared core first, so the bridges pick up its new functions
+    importlib.reload(_bridge_core)
     importlib.reload(nuke_bridge_enhanced)
-    importlib.reload(nuke_bridge_vfx)
+    # nuke_bridge_vfx is only imported once a VFX command is first used
+    if 'nuke_bridge_vfx' in sys.modules:
+        importlib.reload(sys.modules['nuke_bridge_vfx'])
     importlib.reload(nuke_bridge_server)
     print("Bridge modules reloaded")
 except Exception as e:
@@ -2,6 +2,22 @@
 import socket
 import json
 import sys
+import struct
+
+# orjson is considerably faster and works on bytes directly; fall back to the stdlib
+try:
+    import orjson
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj):
+        return json.dumps(obj).encode('utf-8')
+    _loads = json.loads
+
+# Every message on the wire is a 4-byte big-endian payload length and a
+# 1-byte payload format (0 = JSON), followed by the payload
+FRAME_HEADER = struct.Struct('>IB')
+FORMAT_JSON = 0
 
 class NukeMCPClient:
     def __init__(self, host='127.0.0.1', port=8765):
@@ -12,6 +28,7 @@ class NukeMCPClient:
     def connect(self):
         try:
             self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
             self.socket.connect((self.host, self.port))
             print(f"Connected to Nuke MCP server at {self.host}:{self.port}")
             return True
@@ -24,6 +41,15 @@ class NukeMCPClient:
             self.socket.close()
             self.socket = None
     
+    def _recv_exactly(self, size):
+        data = bytearray()
+        while len(data) < size:
+            chunk = self.socket.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("Connection closed by Nuke MCP server")
+            data += chunk
+        return data
+    
     def send_command(self, command_type, args=None):
         if args is None:
             args = {}
@@ -39,11 +65,12 @@ class NukeMCPClient:
         
         try:
             # Send the command
-            self.socket.sendall(json.dumps(command).encode('utf-8'))
+            payload = _dumps(command)
+            self.socket.sendall(FRAME_HEADER.pack(len(payload), FORMAT_JSON) + payload)
             
             # Receive the response
-            response = self.socket.recv(8192).decode('utf-8')
-            return json.loads(response)
+            size, _ = FRAME_HEADER.unpack(self._recv_exactly(FRAME_HEADER.size))
+            return _loads(self._recv_exactly(size))
         except Exception as e:
             print(f"Error sending command: {e}")
             self.disconnect()
@@ -1,11 +1,11 @@
 #!/usr/bin/env python
 import sys
-import json
-import traceback
 import os
 import re
 import glob
 import shutil
+from functools import lru_cache
+from itertools import islice
 from datetime import datetime
 
 # The actual Nuke module - this should be imported when run inside Nuke
@@ -19,169 +19,45 @@ except ImportError as e:
     print(f"Script location: {os.path.abspath(__file__)}", file=sys.stderr)
     sys.exit(1)
 
-# Base functions from the original bridge
-def create_node(args):
-    """Create a node in Nuke"""
-    try:
-        node_type = args.get('nodeType')
-        name = args.get('name')
-        inputs = args.get('inputs', [])
-        
-        if not node_type:
-            return {"error": "nodeType is required"}
-        
-        # Create the node
-        if name:
-            node = nuke.createNode(node_type, f"name {name}")
-        else:
-            node = nuke.createNode(node_type)
-        
-        # Connect inputs if provided
-        for i, input_name in enumerate(inputs):
-            input_node = nuke.toNode(input_name)
-            if input_node:
-                node.setInput(i, input_node)
-            else:
-                return {"error": f"Input node '{input_name}' not found"}
-        
-        return {
-            "success": True,
-            "node": {
-                "name": node.name(),
-                "type": node_type
-            }
-        }
-    except Exception as e:
-        return {"error": str(e), "traceback": traceback.format_exc()}
+# Base functions and helpers shared with the original bridge
+from _bridge_core import (
+    create_node, set_knob_value, get_node, execute_render,
+    render_status, render_wait, COMMANDS_BASE, run,
+    _error, _batch, _no_undo, _to_node, _clear_selection
+)
 
-def set_knob_value(args):
-    """Set a knob value on a node"""
-    try:
-        node_name = args.get('nodeName')
-        knob_name = args.get('knobName')
-        value = args.get('value')
-        
-        if not node_name:
-            return {"error": "nodeName is required"}
-        if not knob_name:
-            return {"error": "knobName is required"}
-        if value is None:
-            return {"error": "value is required"}
-        
-        # Get the node
-        node = nuke.toNode(node_name)
-        if not node:
-            return {"error": f"Node '{node_name}' not found"}
-        
-        # Set the knob value
-        knob = node.knob(knob_name)
-        if not knob:
-            return {"error": f"Knob '{knob_name}' not found on node '{node_name}'"}
-        
-        # Handle different value types
-        try:
-            # Check if this is an array knob
-            if hasattr(knob, 'dimensions') and knob.dimensions() > 1:
-                # For array knobs like color, position, etc.
-                if isinstance(value, list) or isinstance(value, tuple):
-                    for i, component in enumerate(value):
-                        if i < knob.dimensions():
-                            knob.setValue(float(component), i)
-                else:
-                    # Single value for all dimensions
-                    for i in range(knob.dimensions()):
-                        knob.setValue(float(value), i)
-            elif knob.Class() in ["Enumeration_Knob", "Boolean_Knob"]:
-                # Handle enumeration knobs
-                if isinstance(value, str):
-                    knob.setValue(value)
-                else:
-                    knob.setValue(int(value))
-            else:
-                # Standard knobs
-                knob.setValue(value)
-        except Exception as e:
-            return {"error": f"Failed to set value: {str(e)}"}
-            
-        return {
-            "success": True,
-            "node": node_name,
-            "knob": knob_name,
-            "value": value
-        }
-    except Exception as e:
-        return {"error": str(e), "traceback": traceback.format_exc()}
+# .nk files found in each ToolSets directory, as {directory: (mtime, {name: path})}
+_toolset_index = {}
 
-def get_node(args):
-    """Get information about a node"""
+def _toolsets_in(directory):
+    """{name: path} of the templates in a directory, rescanned only when it changes"""
     try:
-        node_name = args.get('nodeName')
-        
-        if not node_name:
-            return {"error": "nodeName is required"}
-        
-        # Get the node
-        node = nuke.toNode(node_name)
-        if not node:
-            return {"error": f"Node '{node_name}' not found"}
-        
-        # Gather basic information about the node
-        knob_dict = {}
-        for k in node.knobs():
-            knob = node.knob(k)
-            if knob.visible():
-                try:
-                    knob_dict[k] = knob.value()
-                except:
-                    knob_dict[k] = str(knob)
-        
-        return {
-            "success": True,
-            "node": {
-                "name": node.name(),
-                "type": node.Class(),
-                "knobs": knob_dict
-            }
-        }
-    except Exception as e:
-        return {"error": str(e), "traceback": traceback.format_exc()}
+        mtime = os.stat(directory).st_mtime_ns
+    except OSError:
+        _toolset_index.pop(directory, None)
+        return {}
+    
+    cached = _toolset_index.get(directory)
+    if cached is None or cached[0] != mtime:
+        with os.scandir(directory) as entries:
+            templates = {e.name[:-3]: e.path for e in entries if e.name.endswith('.nk')}
+        cached = _toolset_index[directory] = (mtime, templates)
+    return cached[1]
 
-def execute_render(args):
-    """Execute a render using a Write node"""
-    try:
-        write_node_name = args.get('writeNodeName')
-        frame_range_start = args.get('frameRangeStart')
-        frame_range_end = args.get('frameRangeEnd')
-        
-        if not write_node_name:
-            return {"error": "writeNodeName is required"}
-        if frame_range_start is None:
-            return {"error": "frameRangeStart is required"}
-        if frame_range_end is None:
-            return {"error": "frameRangeEnd is required"}
-        
-        # Get the Write node
-        write_node = nuke.toNode(write_node_name)
-        if not write_node:
-            return {"error": f"Write node '{write_node_name}' not found"}
-        
-        # Check if it's a Write node
-        if write_node.Class() != "Write":
-            return {"error": f"Node '{write_node_name}' is not a Write node"}
-        
-        # Execute the render
-        nuke.execute(write_node_name, int(frame_range_start), int(frame_range_end))
-        
-        return {
-            "success": True,
-            "writeNode": write_node_name,
-            "frameRange": {
-                "start": frame_range_start,
-                "end": frame_range_end
-            }
-        }
-    except Exception as e:
-        return {"error": str(e), "traceback": traceback.format_exc()}
+def _find_toolset(template_name):
+    """Path of a template in Nuke's or the user's ToolSets, or None"""
+    # Templates saved under a category are named "Category/Name"
+    category, name = os.path.split(template_name)
+    roots = [
+        os.path.join(os.path.dirname(nuke.EXE_PATH), 'ToolSets'),
+        os.path.join(os.path.expanduser('~'), '.nuke', 'ToolSets'),
+    ]
+    for root in roots:
+        directory = os.path.join(root, category) if category else root
+        path = _toolsets_in(directory).get(name)
+        if path:
+            return path
+    return None
 
 # New functions for node graph management
 
@@ -198,8 +74,8 @@ def connect_nodes(args):
             return {"error": "outputNode is required"}
         
         # Get the nodes
-        in_node = nuke.toNode(input_node)
-        out_node = nuke.toNode(output_node)
+        in_node = _to_node(input_node)
+        out_node = _to_node(output_node)
         
         if not in_node:
             return {"error": f"Input node '{input_node}' not found"}
@@ -216,7 +92,7 @@ def connect_nodes(args):
             "inputIndex": input_index
         }
     except Exception as e:
-        return {"error": str(e), "traceback": traceback.format_exc()}
+        return _error(e)
 
 def set_node_position(args):
     """Set the position of a node in the node graph"""
@@ -233,7 +109,7 @@ def set_node_position(args):
             return {"error": "yPos is required"}
         
         # Get the node
-        node = nuke.toNode(node_name)
+        node = _to_node(node_name)
         if not node:
             return {"error": f"Node '{node_name}' not found"}
         
@@ -249,7 +125,7 @@ def set_node_position(args):
             }
         }
     except Exception as e:
-        return {"error": str(e), "traceback": traceback.format_exc()}
+        return _error(e)
 
 def get_node_position(args):
     """Get the position of a node in the node graph"""
@@ -260,7 +136,7 @@ def get_node_position(args):
             return {"error": "nodeName is required"}
         
         # Get the node
-        node = nuke.toNode(node_name)
+        node = _to_node(node_name)
         if not node:
             return {"error": f"Node '{node_name}' not found"}
         
@@ -277,7 +153,7 @@ def get_node_position(args):
             }
         }
     except Exception as e:
-        return {"error": str(e), "traceback": traceback.format_exc()}
+        return _error(e)
 
 def create_group(args):
     """Create a group node containing specified nodes"""
@@ -285,23 +161,26 @@ def create_group(args):
         name = args.get('name')
         node_names = args.get('nodeNames', [])
         
-        # Select the nodes to include in the group
-        nuke.selectAll()
-        nuke.invertSelection()
-        
+        # Find every node before touching the selection
+        nodes = []
         for node_name in node_names:
-            node = nuke.toNode(node_name)
-            if node:
-                node.setSelected(True)
-            else:
+            node = _to_node(node_name)
+            if not node:
                 return {"error": f"Node '{node_name}' not found"}
+            nodes.append(node)
         
-        # Create group from selection
-        group_node = nuke.collapseToGroup()
-        
-        # Set name if provided
-        if name:
-            group_node.setName(name)
+        with _no_undo():
+            # Select just the nodes to include in the group
+            _clear_selection()
+            for node in nodes:
+                node.setSelected(True)
+            
+            # Create group from selection
+            group_node = nuke.collapseToGroup()
+            
+            # Set name if provided
+            if name:
+                group_node.setName(name)
         
         return {
             "success": True,
@@ -311,7 +190,7 @@ def create_group(args):
             }
         }
     except Exception as e:
-        return {"error": str(e), "traceback": traceback.format_exc()}
+        return _error(e)
 
 def create_live_group(args):
     """Create a LiveGroup node for collaborative work"""
@@ -320,28 +199,31 @@ def create_live_group(args):
         node_names = args.get('nodeNames', [])
         file_path = args.get('filePath')
         
-        # Select the nodes to include in the LiveGroup
-        nuke.selectAll()
-        nuke.invertSelection()
-        
+        # Find every node before touching the selection
+        nodes = []
         for node_name in node_names:
-            node = nuke.toNode(node_name)
-            if node:
-                node.setSelected(True)
-            else:
+            node = _to_node(node_name)
+            if not node:
                 return {"error": f"Node '{node_name}' not found"}
+            nodes.append(node)
         
-        # Create LiveGroup from selection
-        live_group_node = nuke.collapseToLiveGroup()
-        
-        # Set name if provided
-        if name:
-            live_group_node.setName(name)
-        
-        # Save the LiveGroup to file if path provided
-        if file_path:
-            live_group_node.knob('file').setValue(file_path)
-            live_group_node.knob('save').execute()
+        with _no_undo():
+            # Select just the nodes to include in the LiveGroup
+            _clear_selection()
+            for node in nodes:
+                node.setSelected(True)
+            
+            # Create LiveGroup from selection
+            live_group_node = nuke.collapseToLiveGroup()
+            
+            # Set name if provided
+            if name:
+                live_group_node.setName(name)
+            
+            # Save the LiveGroup to file if path provided
+            if file_path:
+                live_group_node.knob('file').setValue(file_path)
+                live_group_node.knob('save').execute()
         
         return {
             "success": True,
@@ -352,7 +234,7 @@ def create_live_group(args):
             }
         }
     except Exception as e:
-        return {"error": str(e), "traceback": traceback.format_exc()}
+        return _error(e)
 
 def load_template(args):
     """Load a Nuke template (Toolset) into the current script"""
@@ -363,26 +245,8 @@ def load_template(args):
         if not template_name:
             return {"error": "templateName is required"}
         
-        # Get the toolset paths
-        toolset_paths = []
-        
-        # Add standard Nuke toolset path
-        nuke_dir = os.path.dirname(nuke.EXE_PATH)
-        toolset_paths.append(os.path.join(nuke_dir, 'ToolSets'))
-        
-        # Add user's .nuke/ToolSets directory
-        home_dir = os.path.expanduser('~')
-        user_toolset_dir = os.path.join(home_dir, '.nuke', 'ToolSets')
-        if os.path.exists(user_toolset_dir):
-            toolset_paths.append(user_toolset_dir)
-        
-        # Search for the template in all toolset paths
-        template_path = None
-        for path in toolset_paths:
-            possible_path = os.path.join(path, template_name + '.nk')
-            if os.path.exists(possible_path):
-                template_path = possible_path
-                break
+        # Search for the template in Nuke's and the user's ToolSets
+        template_path = _find_toolset(template_name)
         
         if not template_path:
             return {"error": f"Template '{template_name}' not found in ToolSets"}
@@ -391,18 +255,19 @@ def load_template(args):
         x_pos = position.get('x', 0)
         y_pos = position.get('y', 0)
         
-        # Read nodes from the template file
-        nuke.nodePaste(template_path)
-        
-        # Get the newly created nodes
-        new_nodes = [n for n in nuke.selectedNodes()]
-        
-        # Reposition the template if position is specified
-        if x_pos != 0 or y_pos != 0:
-            for i, node in enumerate(new_nodes):
-                node_x = node.xpos()
-                node_y = node.ypos()
-                node.setXYpos(node_x + x_pos, node_y + y_pos)
+        with _no_undo():
+            # Read nodes from the template file
+            nuke.nodePaste(template_path)
+            
+            # Get the newly created nodes
+            new_nodes = [n for n in nuke.selectedNodes()]
+            
+            # Reposition the template if position is specified
+            if x_pos != 0 or y_pos != 0:
+                for i, node in enumerate(new_nodes):
+                    node_x = node.xpos()
+                    node_y = node.ypos()
+                    node.setXYpos(node_x + x_pos, node_y + y_pos)
         
         return {
             "success": True,
@@ -410,7 +275,7 @@ def load_template(args):
             "nodes": [n.name() for n in new_nodes]
         }
     except Exception as e:
-        return {"error": str(e), "traceback": traceback.format_exc()}
+        return _error(e)
 
 def save_template(args):
     """Save selected nodes as a template (Toolset)"""
@@ -424,37 +289,36 @@ def save_template(args):
         if not node_names:
             return {"error": "nodeNames is required"}
         
-        # Select the nodes to include in the template
-        nuke.selectAll()
-        nuke.invertSelection()
-        
+        # Find every node before touching the selection
+        nodes = []
         for node_name in node_names:
-            node = nuke.toNode(node_name)
-            if node:
-                node.setSelected(True)
-            else:
+            node = _to_node(node_name)
+            if not node:
                 return {"error": f"Node '{node_name}' not found"}
+            nodes.append(node)
+        
+        with _no_undo():
+            # Select just the nodes to include in the template
+            _clear_selection()
+            for node in nodes:
+                node.setSelected(True)
         
         # Get the user's .nuke/ToolSets directory
         home_dir = os.path.expanduser('~')
         user_toolset_dir = os.path.join(home_dir, '.nuke', 'ToolSets')
         
-        # Create the directory if it doesn't exist
-        if not os.path.exists(user_toolset_dir):
-            os.makedirs(user_toolset_dir)
-        
-        # Create category directory if specified
-        if category:
-            category_dir = os.path.join(user_toolset_dir, category)
-            if not os.path.exists(category_dir):
-                os.makedirs(category_dir)
-            save_path = os.path.join(category_dir, template_name + '.nk')
-        else:
-            save_path = os.path.join(user_toolset_dir, template_name + '.nk')
+        # Create the (category) directory if it doesn't exist
+        save_dir = os.path.join(user_toolset_dir, category) if category else user_toolset_dir
+        os.makedirs(save_dir, exist_ok=True)
+        save_path = os.path.join(save_dir, template_name + '.nk')
         
         # Save the selected nodes as a toolset
         nuke.nodeCopy(save_path)
         
+        # Make load_template see the new file even if the directory's mtime
+        # didn't visibly change (coarse timestamps)
+        _toolset_index.pop(save_dir, None)
+        
         return {
             "success": True,
             "template": {
@@ -465,25 +329,55 @@ def save_template(args):
             }
         }
     except Exception as e:
-        return {"error": str(e), "traceback": traceback.format_exc()}
+        return _error(e)
+
+# Nodes per message when listNodes streams its result
+STREAM_CHUNK_SIZE = 512
+
+def _node_summary(node):
+    return {
+        "name": node.name(),
+        "type": node.Class(),
+        "position": {"x": node.xpos(), "y": node.ypos()}
+    }
+
+def _stream_nodes(all_nodes):
+    """Yield listNodes results in chunks, ending with the total count, so
+    neither side holds the whole list at once"""
+    remaining = iter(all_nodes)
+    count = 0
+    while True:
+        chunk = [_node_summary(node) for node in islice(remaining, STREAM_CHUNK_SIZE)]
+        if not chunk:
+            break
+        count += len(chunk)
+        yield {"type": "chunk", "nodes": chunk}
+    yield {"success": True, "type": "end", "count": count}
 
 def list_nodes(args):
     """List all nodes in the current script, optionally filtered by type"""
     try:
         filter_type = args.get('filter', '')
         
-        nodes = []
-        for node in nuke.allNodes(filter_type):
-            # Get basic info for each node
-            node_info = {
-                "name": node.name(),
-                "type": node.Class(),
-                "position": {
-                    "x": node.xpos(),
-                    "y": node.ypos()
-                }
+        all_nodes = nuke.allNodes(filter_type)
+        
+        if args.get('columns'):
+            # One list per field instead of a dict per node; much smaller and
+            # quicker to serialize for large scripts
+            return {
+                "success": True,
+                "count": len(all_nodes),
+                "names": [node.name() for node in all_nodes],
+                "types": [node.Class() for node in all_nodes],
+                "xs": [node.xpos() for node in all_nodes],
+                "ys": [node.ypos() for node in all_nodes]
             }
-            nodes.append(node_info)
+        
+        if args.get('stream'):
+            return _stream_nodes(all_nodes)
+        
+        # Get basic info for each node
+        nodes = [_node_summary(node) for node in all_nodes]
         
         return {
             "success": True,
@@ -491,7 +385,12 @@ def list_nodes(args):
             "nodes": nodes
         }
     except Exception as e:
-        return {"error": str(e), "traceback": traceback.format_exc()}
+        return _error(e)
+
+@lru_cache(maxsize=256)
+def _compile_script(script):
+    """Compile a runPythonScript body; clients often send the same one repeatedly"""
+    return compile(script, '<mcp-script>', 'exec')
 
 def run_python_script(args):
     """Run a Python script in Nuke"""
@@ -505,8 +404,8 @@ def run_python_script(args):
         # Create a namespace for the script
         script_namespace = {'args': script_args, 'nuke': nuke, 'nukescripts': nukescripts}
         
-        # Execute the script
-        exec(script, script_namespace)
+        # Execute the script, reusing the compiled code if it has been sent before
+        exec(_compile_script(script), script_namespace)
         
         # Get any result the script might have set
         result = script_namespace.get('result', None)
@@ -516,7 +415,7 @@ def run_python_script(args):
             "result": result
         }
     except Exception as e:
-        return {"error": str(e), "traceback": traceback.format_exc()}
+        return _error(e)
 
 def load_script(args):
     """Load a Nuke script file"""
@@ -538,7 +437,7 @@ def load_script(args):
             "script": file_path
         }
     except Exception as e:
-        return {"error": str(e), "traceback": traceback.format_exc()}
+        return _error(e)
 
 def save_script(args):
     """Save the current Nuke script to a file"""
@@ -561,7 +460,7 @@ def save_script(args):
             "script": file_path
         }
     except Exception as e:
-        return {"error": str(e), "traceback": traceback.format_exc()}
+        return _error(e)
 
 def set_project_settings(args):
     """Set project settings like frame range, resolution and FPS"""
@@ -571,90 +470,126 @@ def set_project_settings(args):
         fps = args.get('fps')
         
         root = nuke.root()
-        
-        # Set frame range if provided
-        if frame_range:
-            first_frame = frame_range.get('first')
-            last_frame = frame_range.get('last')
+        # One snapshot of the root knobs serves both the writes and the echo
+        knobs = root.knobs()
+        
+        with _no_undo():
+            # Set frame range if provided
+            if frame_range:
+                first_frame = frame_range.get('first')
+                last_frame = frame_range.get('last')
+                
+                if first_frame is not None:
+                    knobs['first_frame'].setValue(first_frame)
+                if last_frame is not None:
+                    knobs['last_frame'].setValue(last_frame)
             
-            if first_frame is not None:
-                root.knob('first_frame').setValue(first_frame)
-            if last_frame is not None:
-                root.knob('last_frame').setValue(last_frame)
-        
-        # Set resolution if provided
-        if resolution:
-            width = resolution.get('width')
-            height = resolution.get('height')
+            # Set resolution if provided; the format needs both dimensions
+            if resolution:
+                width = resolution.get('width')
+                height = resolution.get('height')
+                
+                if width is not None and height is not None:
+                    knobs['format'].setValue(f"{width} {height} 0 0 {width} {height} 1")
             
-            if width is not None and height is not None:
-                root.knob('format').setValue(f"{width} {height} 0 0 {width} {height} 1")
-        
-        # Set FPS if provided
-        if fps is not None:
-            root.knob('fps').setValue(fps)
+            # Set FPS if provided
+            if fps is not None:
+                knobs['fps'].setValue(fps)
         
         return {
             "success": True,
             "settings": {
                 "frameRange": {
-                    "first": root.knob('first_frame').value(),
-                    "last": root.knob('last_frame').value()
+                    "first": knobs['first_frame'].value(),
+                    "last": knobs['last_frame'].value()
                 },
                 "resolution": {
                     "width": root.width(),
                     "height": root.height()
                 },
-                "fps": root.knob('fps').value()
+                "fps": knobs['fps'].value()
             }
         }
     except Exception as e:
-        return {"error": str(e), "traceback": traceback.format_exc()}
+        return _error(e)
+
+# Commands after which nodes have to be looked up afresh, as they may have been
+# deleted, renamed or moved into a group
+_RESOLVE_AFTER = {"createGroup", "createLiveGroup", "loadTemplate", "runPythonScript", "loadScript"}
+
+# Commands a batch won't run. A batch runs as one call on Nuke's main thread
+# in nuke_bridge_server, where waiting on a render would freeze the GUI; the
+# server runs these on a worker thread (its WORKER_THREAD_COMMANDS) instead.
+_NOT_IN_BATCH = frozenset(("renderStatus", "renderWait"))
+
+def _renames(command, args):
+    """Whether an operation sets a node's name knob, so its old name no longer
+    finds it"""
+    return command == "setKnobValue" and isinstance(args, dict) and args.get('knobName') == 'name'
+
+def batch(args):
+    """Run a list of {command, args} operations as one command"""
+    try:
+        ops = args.get('ops')
+        
+        if not isinstance(ops, list):
+            return {"error": "ops is required"}
+        
+        # Nodes are looked up at most once for the whole batch, and the
+        # batch leaves no undo steps behind
+        results = []
+        _batch.nodes = {}
+        try:
+            with _no_undo():
+                for op in ops:
+                    command = op.get('command')
+                    handler = COMMANDS.get(command)
+                    if handler is None or handler is batch:
+                        results.append({"error": f"Unknown command: {command}"})
+                        continue
+                    if command in _NOT_IN_BATCH:
+                        results.append({"error": f"{command} can't run inside a batch; send it on its own"})
+                        continue
+                    
+                    op_args = op.get('args', {})
+                    result = handler(op_args)
+                    if not isinstance(result, dict):
+                        # A streamed result; batch results go back in one message
+                        result = list(result)
+                    results.append(result)
+                    if command in _RESOLVE_AFTER or _renames(command, op_args):
+                        _batch.nodes.clear()
+        finally:
+            _batch.nodes = None
+        
+        return {
+            "success": True,
+            "results": results
+        }
+    except Exception as e:
+        return _error(e)
+
+# Map command names to functions
+COMMANDS = {
+    **COMMANDS_BASE,
+    "connectNodes": connect_nodes,
+    "setNodePosition": set_node_position,
+    "getNodePosition": get_node_position,
+    "createGroup": create_group,
+    "createLiveGroup": create_live_group,
+    "loadTemplate": load_template,
+    "saveTemplate": save_template,
+    "listNodes": list_nodes,
+    "runPythonScript": run_python_script,
+    "loadScript": load_script,
+    "saveScript": save_script,
+    "setProjectSettings": set_project_settings,
+    "batch": batch
+}
 
 def main():
     """Main entry point for the bridge script"""
-    if len(sys.argv) < 2:
-        print(json.dumps({"error": "No command specified"}))
-        return
-    
-    command = sys.argv[1]
-    
-    # Parse arguments
-    args = {}
-    if len(sys.argv) > 2:
-        try:
-            args = json.loads(sys.argv[2])
-        except json.JSONDecodeError:
-            print(json.dumps({"error": "Invalid JSON arguments"}))
-            return
-    
-    # Execute the appropriate command
-    commands = {
-        "createNode": create_node,
-        "setKnobValue": set_knob_value,
-        "getNode": get_node,
-        "execute": execute_render,
-        "connectNodes": connect_nodes,
-        "setNodePosition": set_node_position,
-        "getNodePosition": get_node_position,
-        "createGroup": create_group,
-        "createLiveGroup": create_live_group,
-        "loadTemplate": load_template,
-        "saveTemplate": save_template,
-        "listNodes": list_nodes,
-        "runPythonScript": run_python_script,
-        "loadScript": load_script,
-        "saveScript": save_script,
-        "setProjectSettings": set_project_settings
-    }
-    
-    if command in commands:
-        result = commands[command](args)
-    else:
-        result = {"error": f"Unknown command: {command}"}
-    
-    # Print the result as JSON
-    print(json.dumps(result))
+    run(COMMANDS)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -2,9 +2,29 @@
 import os
 import socket
 import threading
+import asyncio
+import struct
 import json
 import sys
-import traceback
+import re
+import types
+import logging
+import importlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Per-command messages are logged at DEBUG, which is off unless
+# NUKE_BRIDGE_DEBUG is set; formatting every command and response for the
+# Script Editor is not free
+log = logging.getLogger('nuke_bridge')
+if os.environ.get('NUKE_BRIDGE_DEBUG'):
+    log.setLevel(logging.DEBUG)
+    if not log.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter('[NukeBridgeServer] %(message)s'))
+        log.addHandler(handler)
+else:
+    log.setLevel(logging.INFO)
 
 # Import Nuke modules when running inside Nuke
 try:
@@ -15,22 +35,48 @@ except ImportError:
     print("ERROR: This script must be run from within Nuke's Python environment.")
     sys.exit(1)
 
+# orjson is considerably faster and works on bytes directly; fall back to the stdlib
+try:
+    import orjson
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj):
+        return json.dumps(obj).encode('utf-8')
+    # Every command is a JSON object; anything else is turned away before the
+    # (much slower) stdlib parser has to work through it
+    _OBJECT_START = re.compile(r'[ \t\r\n]*\{')
+    def _loads(data):
+        # The stdlib parser won't take the receive buffer's memoryview, so
+        # decode it straight to text in one pass rather than copying it to
+        # bytes for json to decode again
+        data = str(data, 'utf-8')
+        if not _OBJECT_START.match(data):
+            raise ValueError("command must be an object")
+        return json.loads(data)
+
+# Constant error responses, encoded once. Handlers may return bytes like
+# these, which are sent as they are instead of being encoded again.
+_MODULES_NOT_LOADED = _dumps({"error": "Function not available. Bridge modules not loaded correctly."})
+_UNKNOWN_COMMAND_PREFIX = b'{"error":"Unknown command type: '
+_UNKNOWN_COMMAND_SUFFIX = b'"}'
+_ERROR_PREFIX = b'{"error":'
+_ERROR_SUFFIX = b'}'
+
+def _error_response(message):
+    """An encoded {"error": message} response"""
+    # Only the message varies, so it is the only part encoded per error
+    return _ERROR_PREFIX + _dumps(message) + _ERROR_SUFFIX
+
 # Import our enhanced bridge modules
 try:
     # Load functions from our bridge files
     from nuke_bridge_enhanced import (
         create_node, set_knob_value, get_node, execute_render,
-        connect_nodes, set_node_position, get_node_position,
+        render_status, render_wait, connect_nodes, set_node_position, get_node_position,
         create_group, create_live_group, load_template, save_template,
         list_nodes, run_python_script, load_script, save_script,
-        set_project_settings
-    )
-    
-    from nuke_bridge_vfx import (
-        create_camera_tracker, solve_camera_track, create_scene,
-        setup_deep_pipeline, batch_process, setup_copycat,
-        train_copycat_model, setup_basic_comp, setup_keyer,
-        setup_motion_blur
+        set_project_settings, batch
     )
     
     print("Successfully imported bridge modules")
@@ -39,13 +85,15 @@ except ImportError as e:
     # If running directly in Nuke, the modules may not be available
     # Define placeholder functions to avoid errors
     def missing_function(args):
-        return {"error": "Function not available. Bridge modules not loaded correctly."}
+        return _MODULES_NOT_LOADED
     
     # Basic functions
     create_node = missing_function
     set_knob_value = missing_function
     get_node = missing_function
     execute_render = missing_function
+    render_status = missing_function
+    render_wait = missing_function
     connect_nodes = missing_function
     set_node_position = missing_function
     get_node_position = missing_function
@@ -58,26 +106,78 @@ except ImportError as e:
     load_script = missing_function
     save_script = missing_function
     set_project_settings = missing_function
+    batch = missing_function
+
+class _Lazy:
+    """A command handler that is imported the first time it is called.
+    
+    Sessions that never use the VFX commands never import nuke_bridge_vfx.
+    """
+    __slots__ = ('module', 'name', 'fn')
+    
+    def __init__(self, module, name):
+        self.module = module
+        self.name = name
+        self.fn = None
     
-    # VFX functions
-    create_camera_tracker = missing_function
-    solve_camera_track = missing_function
-    create_scene = missing_function
-    setup_deep_pipeline = missing_function
-    batch_process = missing_function
-    setup_copycat = missing_function
-    train_copycat_model = missing_function
-    setup_basic_comp = missing_function
-    setup_keyer = missing_function
-    setup_motion_blur = missing_function
-
-# Map command names to functions
-COMMAND_MAP = {
+    def __call__(self, args):
+        fn = self.fn
+        if fn is None:
+            try:
+                fn = getattr(importlib.import_module(self.module), self.name)
+            except ImportError as e:
+                print(f"Error importing bridge modules: {e}")
+                return _MODULES_NOT_LOADED
+            self.fn = fn
+        return fn(args)
+
+# Every message on the wire is a 4-byte big-endian payload length and a
+# 1-byte payload format, followed by the payload (the same framing as
+# foundry_nuke_bridge.py). This server only speaks JSON.
+FRAME_HEADER = struct.Struct('>IB')
+FORMAT_JSON = 0
+
+# Windows sockets have no sendmsg; frames are sent as one concatenated buffer there
+_HAS_SENDMSG = hasattr(socket.socket, 'sendmsg')
+
+# Initial size of each connection's receive buffer; grown for larger commands
+RECV_BUFFER_SIZE = 1 << 16
+
+# Pending connections the kernel queues before accepting them, so a client
+# reconnecting in a loop isn't refused
+LISTEN_BACKLOG = 128
+
+# Kernel send/receive buffer size for the bridge sockets
+SOCKET_BUFFER_SIZE = 1 << 20
+
+# Options applied to the listening socket and to every accepted client, as
+# (level, option, value). Responses are small and latency-bound, so Nagle's
+# algorithm is off by default. Fixed buffer sizes give large templates
+# predictable throughput, but turn off Linux's buffer autotuning; that suits
+# the loopback connections this bridge is meant for, while clients on slower
+# remote links may do better passing socket_options without them.
+DEFAULT_SOCKET_OPTIONS = (
+    (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+    (socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER_SIZE),
+    (socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER_SIZE),
+)
+if hasattr(socket, 'TCP_NOTSENT_LOWAT'):
+    # Linux/macOS: don't queue more unsent data than this in the kernel, so a
+    # large response can't delay the next one on the same connection
+    DEFAULT_SOCKET_OPTIONS += ((socket.IPPROTO_TCP, socket.TCP_NOTSENT_LOWAT, 16384),)
+
+# Map command names to functions. The mapping is fixed once the bridge
+# modules are imported, so it is exposed read-only. The keys are literals and
+# therefore already interned; the command name parsed from each request is a
+# fresh string, and interning it would cost another dict lookup per command.
+COMMAND_MAP = types.MappingProxyType({
     # Basic commands
     "createNode": create_node,
     "setKnobValue": set_knob_value,
     "getNode": get_node,
     "execute": execute_render,
+    "renderStatus": render_status,
+    "renderWait": render_wait,
     "connectNodes": connect_nodes,
     "setNodePosition": set_node_position,
     "getNodePosition": get_node_position,
@@ -90,106 +190,492 @@ COMMAND_MAP = {
     "loadScript": load_script,
     "saveScript": save_script,
     "setProjectSettings": set_project_settings,
+    "batch": batch,
     
     # VFX commands
-    "createCameraTracker": create_camera_tracker,
-    "solveCameraTrack": solve_camera_track,
-    "createScene": create_scene,
-    "setupDeepPipeline": setup_deep_pipeline,
-    "batchProcess": batch_process,
-    "setupCopyCat": setup_copycat,
-    "trainCopyCatModel": train_copycat_model,
-    "setupBasicComp": setup_basic_comp,
-    "setupKeyer": setup_keyer,
-    "setupMotionBlur": setup_motion_blur,
-}
-
-class NukeBridgeServer(threading.Thread):
-    def __init__(self, host='127.0.0.1', port=8765):
-        threading.Thread.__init__(self)
+    "createCameraTracker": _Lazy("nuke_bridge_vfx", "create_camera_tracker"),
+    "solveCameraTrack": _Lazy("nuke_bridge_vfx", "solve_camera_track"),
+    "createScene": _Lazy("nuke_bridge_vfx", "create_scene"),
+    "setupDeepPipeline": _Lazy("nuke_bridge_vfx", "setup_deep_pipeline"),
+    "batchProcess": _Lazy("nuke_bridge_vfx", "batch_process"),
+    "setupCopyCat": _Lazy("nuke_bridge_vfx", "setup_copycat"),
+    "trainCopyCatModel": _Lazy("nuke_bridge_vfx", "train_copycat_model"),
+    "setupBasicComp": _Lazy("nuke_bridge_vfx", "setup_basic_comp"),
+    "setupKeyer": _Lazy("nuke_bridge_vfx", "setup_keyer"),
+    "setupMotionBlur": _Lazy("nuke_bridge_vfx", "setup_motion_blur"),
+})
+
+# Commands that don't use the Nuke API, and may block for a long time, so they
+# run on a worker thread instead of holding up Nuke's main thread (and every
+# command queued behind them)
+WORKER_THREAD_COMMANDS = frozenset(("renderStatus", "renderWait"))
+
+# Most commands run on worker threads at once
+MAX_WORKER_THREADS = 4
+
+# Read-only commands whose responses are cached until the node graph changes
+CACHED_COMMANDS = frozenset(("listNodes", "getNode", "getNodePosition"))
+
+# Cached responses kept; the least recently used is dropped first
+RESPONSE_CACHE_SIZE = 256
+
+# Longest a cached response is served, in seconds. A backstop for graph
+# changes that none of the Nuke callbacks below report.
+RESPONSE_CACHE_MAX_AGE = 2.0
+
+# Nuke callbacks fired when the node graph changes outside the bridge, e.g.
+# when the user edits the script by hand
+GRAPH_CALLBACKS = (
+    ('addOnCreate', 'removeOnCreate'),
+    ('addOnDestroy', 'removeOnDestroy'),
+    ('addKnobChanged', 'removeKnobChanged'),
+    ('addOnScriptLoad', 'removeOnScriptLoad'),
+    ('addOnScriptClose', 'removeOnScriptClose'),
+)
+
+# Most commands coalesced into a single trip to Nuke's main thread
+MAX_BATCH_SIZE = 32
+
+# Most clients served at once. Each holds a receive buffer and kernel socket
+# buffers, so a reconnect storm can't grow the server without bound; further
+# connections wait in the listen backlog until a client disconnects.
+MAX_CLIENTS = 64
+
+# Seconds to wait before accepting again after a failed accept
+ACCEPT_RETRY_DELAY = 0.1
+
+def _gather(messages):
+    """One response for a streamed result (listNodes with stream), which this
+    server can't send as several: the chunks' nodes, in order"""
+    nodes = []
+    for message in messages:
+        if message.get("type") == "chunk":
+            nodes.extend(message["nodes"])
+        elif "error" in message:
+            return message
+    return {"success": True, "count": len(nodes), "nodes": nodes}
+
+def _run_batch(calls):
+    """Run queued (fn, args) calls in order. Call from the main thread.
+    
+    Returns a (succeeded, result or exception) pair per call, so one failing
+    command doesn't affect the others in the batch.
+    """
+    results = []
+    for fn, args in calls:
+        try:
+            result = fn(args)
+            if not isinstance(result, (dict, bytes)):
+                # Gathered here, as producing the chunks calls the Nuke API
+                result = _gather(result)
+            results.append((True, result))
+        except Exception as e:
+            results.append((False, e))
+    return results
+
+def _write_key(fn, args):
+    """What a write that may be coalesced sets, or None for any other command.
+    
+    A later setKnobValue on the same knob with a value of the same shape, or
+    connectNodes on the same input, overwrites everything the earlier one set.
+    """
+    if not isinstance(args, dict):
+        return None
+    if fn is set_knob_value:
+        node, knob, value = args.get('nodeName'), args.get('knobName'), args.get('value')
+        # Setting 'name' renames the node, which changes what later writes refer to
+        if not isinstance(node, str) or not isinstance(knob, str) or knob == 'name' or value is None:
+            return None
+        # A list only sets as many components of an array knob as it has, so
+        # a shorter list would leave some of an earlier write's components in
+        # place; a single value sets them all
+        shape = len(value) if isinstance(value, list) else None
+        return ('knob', node, knob, shape)
+    elif fn is connect_nodes:
+        node, index = args.get('outputNode'), args.get('inputIndex', 0)
+        if isinstance(node, str) and isinstance(index, int):
+            return ('input', node, index)
+    return None
+
+def _coalesce(batch):
+    """Drop writes from a batch of (fn, args, future) that a later write overwrites.
+    
+    Returns the commands to run as (fn, args, futures). Only runs of
+    consecutive writes are coalesced; any other command, reads included, ends
+    the run, so it still sees every write queued before it. A dropped write's
+    future joins those of the write that replaced it, and is answered with
+    that write's result, error included.
+    """
+    kept = []
+    # Index in kept of the last write to each key in the current run
+    last_write = {}
+    for fn, args, future in batch:
+        futures = [future]
+        key = _write_key(fn, args)
+        if key is None:
+            last_write.clear()
+        else:
+            index = last_write.get(key)
+            if index is not None:
+                futures = kept[index][2] + futures
+                kept[index] = None
+            last_write[key] = len(kept)
+        kept.append((fn, args, futures))
+    return [entry for entry in kept if entry is not None]
+
+class NukeBridgeServer:
+    def __init__(self, host='127.0.0.1', port=8765, socket_options=DEFAULT_SOCKET_OPTIONS,
+                 max_clients=MAX_CLIENTS):
         self.host = host
         self.port = port
-        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.socket_options = tuple(socket_options)
+        self.max_clients = max_clients
+        # Every client is served by coroutines on this one loop, which runs in a
+        # single daemon thread, rather than by a thread per connection
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name='NukeBridgeServer')
+        self._thread.daemon = True
+        self._listener = None
+        # Free client slots, taken before each accept and given back on disconnect
+        self._slots = None
+        # The one thread that waits on executeInMainThreadWithResult; batches
+        # go to the main thread one at a time, so it never needs another
+        self._main_thread_waiter = ThreadPoolExecutor(max_workers=1, thread_name_prefix='NukeBridgeServer-main')
+        # Runs WORKER_THREAD_COMMANDS
+        self._worker_threads = ThreadPoolExecutor(max_workers=MAX_WORKER_THREADS, thread_name_prefix='NukeBridgeServer-worker')
+        # Commands waiting for the main thread, as (fn, args, future)
+        self._calls = None
+        # Encoded responses to read-only commands, keyed by (type, encoded args),
+        # as (graph version, time cached, response)
+        self._responses = OrderedDict()
+        # Bumped whenever the node graph may have changed; responses cached at
+        # an older version are stale
+        self._graph_version = 0
         self.running = False
     
-    def run(self):
-        self.server.bind((self.host, self.port))
-        self.server.listen(1)
+    def start(self):
         self.running = True
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._serve(), self._loop)
+        for add, _ in GRAPH_CALLBACKS:
+            try:
+                getattr(nuke, add)(self._graph_changed)
+            except Exception as e:
+                print(f"[NukeBridgeServer] Could not register nuke.{add}: {e}")
+    
+    def _graph_changed(self):
+        # Called from Nuke's callbacks on the main thread as well as from the
+        # loop; a lost increment still leaves the version different from any
+        # version an entry was cached at
+        self._graph_version += 1
+    
+    def _cached_response(self, key):
+        entry = self._responses.get(key)
+        if entry is None:
+            return None
+        version, cached_at, response = entry
+        if version != self._graph_version or self._loop.time() - cached_at > RESPONSE_CACHE_MAX_AGE:
+            del self._responses[key]
+            return None
+        self._responses.move_to_end(key)
+        return response
+    
+    def _cache_response(self, key, version, response):
+        self._responses[key] = (version, self._loop.time(), response)
+        self._responses.move_to_end(key)
+        if len(self._responses) > RESPONSE_CACHE_SIZE:
+            self._responses.popitem(last=False)
+    
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.close()
+    
+    async def _serve(self):
+        loop = asyncio.get_running_loop()
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self._apply_socket_options(listener)
+            listener.bind((self.host, self.port))
+            listener.listen(LISTEN_BACKLOG)
+            listener.setblocking(False)
+        except Exception as e:
+            print(f"[NukeBridgeServer] Error starting server: {e}")
+            listener.close()
+            self.running = False
+            return
+        self._listener = listener
+        self._calls = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_clients)
+        loop.create_task(self._drain_calls())
         print(f"[NukeBridgeServer] Server started on {self.host}:{self.port}")
         
-        while self.running:
+        while True:
+            await self._slots.acquire()
             try:
-                client, address = self.server.accept()
-                print(f"[NukeBridgeServer] Client connected: {address}")
-                
-                # Handle client in a separate thread
-                client_thread = threading.Thread(target=self.handle_client, args=(client,))
-                client_thread.daemon = True
-                client_thread.start()
-                
+                client, address = await loop.sock_accept(listener)
+            except OSError as e:
+                self._slots.release()
+                print(f"[NukeBridgeServer] Error accepting client: {e}")
+                # Errors such as running out of file descriptors persist for a
+                # while; don't spin on them
+                await asyncio.sleep(ACCEPT_RETRY_DELAY)
+                continue
+            loop.create_task(self.handle_client(client, address))
+    
+    async def _drain_calls(self):
+        """Hand queued commands to Nuke's main thread, as many per trip as are waiting.
+        
+        Commands that arrive while a batch is on the main thread queue up for
+        the next one, so a burst from concurrent clients costs a few main
+        thread wakeups instead of one per command, and a lone command is
+        never held back waiting for company.
+        """
+        loop = asyncio.get_running_loop()
+        calls = self._calls
+        while True:
+            batch = [await calls.get()]
+            while len(batch) < MAX_BATCH_SIZE and not calls.empty():
+                batch.append(calls.get_nowait())
+            
+            # Skip commands whose client has gone away in the meantime
+            batch = _coalesce([entry for entry in batch if not entry[2].done()])
+            if not batch:
+                continue
+            
+            try:
+                results = await loop.run_in_executor(
+                    self._main_thread_waiter, nuke.executeInMainThreadWithResult, _run_batch,
+                    ([(fn, args) for fn, args, _ in batch],))
             except Exception as e:
-                if self.running:
-                    print(f"[NukeBridgeServer] Error accepting connection: {e}")
+                results = [(False, e)] * len(batch)
+            
+            for (_, _, futures), (succeeded, value) in zip(batch, results):
+                for future in futures:
+                    if future.done():
+                        continue
+                    if succeeded:
+                        future.set_result(value)
+                    else:
+                        future.set_exception(value)
+    
+    def _apply_socket_options(self, sock):
+        for level, option, value in self.socket_options:
+            try:
+                sock.setsockopt(level, option, value)
+            except OSError as e:
+                print(f"[NukeBridgeServer] Could not set socket option {option}: {e}")
     
-    def handle_client(self, client):
+    async def handle_client(self, client, address):
+        log.debug("Client connected: %s", address)
+        self._apply_socket_options(client)
+        loop = asyncio.get_running_loop()
+        
+        # Every frame is read into this one buffer, so steady-state reads
+        # allocate nothing. Commands are decoded before the next frame is read.
+        # Each read takes whatever has arrived, so a small command's header and
+        # body usually come in with one recv; buffer[start:end] is what has
+        # been received but not yet returned.
+        buffer = bytearray(RECV_BUFFER_SIZE)
+        view = memoryview(buffer)
+        start = end = 0
+        
+        async def recv_exactly(size):
+            nonlocal buffer, view, start, end
+            if end - start < size:
+                # Move what's left of the buffered bytes to the front, into a
+                # larger buffer if the frame won't fit
+                pending = end - start
+                if size > len(buffer):
+                    buffer = bytearray(size)
+                    buffer[:pending] = view[start:end]
+                    view = memoryview(buffer)
+                elif start:
+                    view[:pending] = view[start:end]
+                start, end = 0, pending
+                while end < size:
+                    count = await loop.sock_recv_into(client, view[end:])
+                    if not count:
+                        raise ConnectionError("Connection closed by client")
+                    end += count
+            start += size
+            return view[start - size:start]
+        
+        async def send(response):
+            header = FRAME_HEADER.pack(len(response), FORMAT_JSON)
+            if not _HAS_SENDMSG:
+                await loop.sock_sendall(client, header + response)
+                return
+            # Hand the kernel the header and body together, without copying
+            # them into one buffer; whatever doesn't fit in the socket buffer
+            # right away is left to the loop
+            try:
+                sent = client.sendmsg((header, response))
+            except (BlockingIOError, InterruptedError):
+                sent = 0
+            if sent < len(header):
+                await loop.sock_sendall(client, header[sent:])
+                sent = len(header)
+            if sent < len(header) + len(response):
+                await loop.sock_sendall(client, memoryview(response)[sent - len(header):])
+        
         try:
             while self.running:
-                data = client.recv(8192)
-                if not data:
-                    break
-                
-                try:
-                    # Parse the command
-                    print(f"[NukeBridgeServer] Received data: {data.decode('utf-8')}")
-                    command = json.loads(data.decode('utf-8'))
-                    result = self.process_command(command)
-                    print(f"[NukeBridgeServer] Sending response: {json.dumps(result)}")
-                    
-                    # Send the result back
-                    response = json.dumps(result).encode('utf-8')
-                    client.sendall(response)
-                    
-                except json.JSONDecodeError as e:
-                    error_response = json.dumps({"error": f"Invalid JSON: {str(e)}"}).encode('utf-8')
-                    client.sendall(error_response)
-                except Exception as e:
-                    traceback.print_exc()
-                    error_response = json.dumps({"error": str(e)}).encode('utf-8')
-                    client.sendall(error_response)
+                # Read exactly one frame, however the bytes were split or
+                # coalesced into TCP segments, then answer it
+                size, fmt = FRAME_HEADER.unpack(await recv_exactly(FRAME_HEADER.size))
+                response = await self._respond(fmt, await recv_exactly(size), client)
+                log.debug("Sending %d bytes", len(response))
+                await send(response)
         
+        except (ConnectionError, asyncio.CancelledError):
+            pass
         except Exception as e:
             print(f"[NukeBridgeServer] Client handling error: {e}")
         finally:
-            print("[NukeBridgeServer] Client disconnected")
+            log.debug("Client disconnected")
             client.close()
+            self._slots.release()
     
-    def process_command(self, command):
-        print(f"[NukeBridgeServer] Processing command: {command}")
+    async def _respond(self, fmt, data, client=None):
+        """The encoded response to one received frame.
+        
+        Bad frames and failed commands are answered with an error response
+        rather than by raising, so the connection loop above stays a straight
+        read, respond, write sequence.
+        """
+        if fmt != FORMAT_JSON:
+            # Answer in JSON, which every client can read, so the client can fall back to it
+            return _error_response(f"Unsupported message format: {fmt}")
+        
+        # Parse the command
+        log.debug("Received %d bytes", len(data))
+        try:
+            command = _loads(data)
+        except ValueError as e:
+            # Raised by both json and orjson for malformed input
+            return _error_response(f"Invalid JSON: {str(e)}")
+        if not isinstance(command, dict):
+            return _error_response("Invalid JSON: command must be an object")
+        
+        result = await self.process_command(command, client)
+        if isinstance(result, bytes):
+            return result
+        try:
+            return _dumps(result)
+        except Exception as e:
+            # Formatting the traceback is only worth it when debugging
+            log.debug("Error encoding response", exc_info=True)
+            return _error_response(str(e))
+    
+    def _watch_for_hangup(self, client, future):
+        """Cancel future if the client's connection is reset before it is
+        answered, so the queued command is skipped rather than run for nobody.
+        
+        Returns whether the client is being watched; stop with remove_reader.
+        """
+        loop = self._loop
+        fd = client.fileno()
+        
+        def readable():
+            # The connection was reset, the client sent its next command
+            # early, or it shut down its sending side; only a reset means
+            # nobody is left to answer. A client that half-closes after its
+            # command (shutdown(SHUT_WR), nc -N) still reads the response.
+            loop.remove_reader(fd)
+            try:
+                client.recv(1, socket.MSG_PEEK)
+            except (BlockingIOError, InterruptedError):
+                pass
+            except OSError:
+                future.cancel()
+        
+        try:
+            loop.add_reader(fd, readable)
+        except NotImplementedError:
+            # The proactor loop on Windows can't watch sockets this way
+            return False
+        return True
+    
+    async def process_command(self, command, client=None):
+        log.debug("Processing command: %s", command)
         cmd_type = command.get('type')
         args = command.get('args', {})
         
         # Execute the command using our function map
-        if cmd_type in COMMAND_MAP:
+        fn = COMMAND_MAP.get(cmd_type) if isinstance(cmd_type, str) else None
+        if fn is None:
+            # Only the command name varies; encode it as a JSON string body
+            return _UNKNOWN_COMMAND_PREFIX + _dumps(str(cmd_type))[1:-1] + _UNKNOWN_COMMAND_SUFFIX
+        
+        if cmd_type in WORKER_THREAD_COMMANDS:
             try:
-                # Execute the function in the main thread to avoid Nuke API issues
-                result = nuke.executeInMainThread(lambda: COMMAND_MAP[cmd_type](args))
-                return result
+                return await asyncio.get_running_loop().run_in_executor(self._worker_threads, fn, args)
             except Exception as e:
-                traceback.print_exc()
-                return {"error": f"Error executing {cmd_type}: {str(e)}"}
+                log.debug("Error executing %s", cmd_type, exc_info=True)
+                return _error_response(f"Error executing {cmd_type}: {str(e)}")
+        
+        cacheable = cmd_type in CACHED_COMMANDS
+        if cacheable:
+            key = (cmd_type, _dumps(args))
+            response = self._cached_response(key)
+            if response is not None:
+                return response
+            version = self._graph_version
         else:
-            return {"error": f"Unknown command type: {cmd_type}"}
+            # Anything that isn't a known read may change the graph. Commands
+            # run in the order they are queued, so reads queued after this one
+            # see its effects and reads queued before it won't be cached.
+            self._graph_changed()
+        
+        # Execute the function in the main thread to avoid Nuke API issues.
+        # It is queued with any other waiting commands and run in the next batch.
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._calls.put_nowait((fn, args, future))
+        watching = client is not None and self._watch_for_hangup(client, future)
+        try:
+            result = await future
+        except Exception as e:
+            log.debug("Error executing %s", cmd_type, exc_info=True)
+            return _error_response(f"Error executing {cmd_type}: {str(e)}")
+        finally:
+            if watching:
+                loop.remove_reader(client.fileno())
+        
+        if cacheable and version == self._graph_version and isinstance(result, dict) and "error" not in result:
+            # Cache the encoded response so a repeat is sent without encoding it again
+            result = _dumps(result)
+            self._cache_response(key, version, result)
+        return result
+    
+    async def _shutdown(self):
+        # Cancel the accept loop, the handlers of clients that are still
+        # connected and the drainer, then close the listening socket
+        current = asyncio.current_task()
+        tasks = [task for task in asyncio.all_tasks() if task is not current]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._listener is not None:
+            self._listener.close()
+        # Don't wait for a batch still on the main thread
+        self._main_thread_waiter.shutdown(wait=False)
+        self._worker_threads.shutdown(wait=False)
+        self._loop.stop()
     
     def stop(self):
         self.running = False
-        try:
-            # Connect to ourselves to break the accept() call
-            socket.socket(socket.AF_INET, socket.SOCK_STREAM).connect((self.host, self.port))
-            self.server.close()
-        except:
-            pass
+        for _, remove in GRAPH_CALLBACKS:
+            try:
+                getattr(nuke, remove)(self._graph_changed)
+            except Exception:
+                pass
+        # The sockets belong to the loop, so they have to be closed from the loop's thread
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop)
 
 # Global server instance
 _nuke_bridge_server = None
@@ -198,7 +684,6 @@ def start_nuke_bridge_server():
     global _nuke_bridge_server
     if _nuke_bridge_server is None or not _nuke_bridge_server.running:
         _nuke_bridge_server = NukeBridgeServer()
-        _nuke_bridge_server.daemon = True
         _nuke_bridge_server.start()
         
         # Add a menu command to stop the server
@@ -1,11 +1,16 @@
 #!/usr/bin/env python
 import sys
 import json
-import traceback
 import os
 import re
 import glob
+import fnmatch
+import functools
 import shutil
+import subprocess
+import threading
+import queue
+import types
 from datetime import datetime
 
 # The actual Nuke module - this should be imported when run inside Nuke
@@ -18,483 +23,738 @@ except ImportError as e:
     print(f"Current PYTHONPATH: {os.environ.get('PYTHONPATH', 'Not set')}", file=sys.stderr)
     sys.exit(1)
 
+# Helpers shared with the other bridges
+from _bridge_core import run, _clear_selection, _error, _no_undo, _write
+
+# Solve methods accepted by solve_camera_track, and the solver each one runs
+_SOLVE_METHODS = {
+    "Match-Moving": "matchmoving",
+    "Full": "fullsolution",
+    "Refine": "refine"
+}
+
+# Fewest tracks solve_camera_track will run the solver on, by default; with
+# fewer the solve can't converge to anything useful
+MIN_SOLVE_TRACKS = 20
+
+# CopyCat network types, by the name clients use
+_NETWORK_TYPES = {
+    "Basic": "basic",
+    "UNet": "unet",
+    "Extended": "extended"
+}
+
+# Channel name prefixes of deep data, and the file extensions of EXRs
+_DEEP_PREFIXES = ('deep.',)
+_EXR_SUFFIXES = ('.exr', '.EXR')
+
+def _vfx(fn):
+    """Decorator turning an exception raised by a VFX command into its error result"""
+    @functools.wraps(fn)
+    def command(args):
+        try:
+            return fn(args)
+        except Exception as e:
+            return _error(e)
+    return command
+
+def _not_found(kind, names):
+    """Error message for one or more node names that don't exist"""
+    if len(names) == 1:
+        return f"{kind} '{names[0]}' not found"
+    return f"{kind}s not found: " + ", ".join(f"'{name}'" for name in names)
+
+# Whether each EXR read so far has deep channels, as {path: (mtime, has_deep)}
+_deep_probes = {}
+
+def _has_deep_channels(read_node, file_path):
+    """Whether a Read node's EXR has deep channels, probed once per file version.
+    
+    Listing a multichannel EXR's channels is slow, and deep comps often read
+    the same file through several Read nodes.
+    """
+    try:
+        mtime = os.stat(file_path).st_mtime_ns
+    except OSError:
+        # e.g. a frame pattern rather than a single file; probe it every time
+        mtime = None
+    
+    cached = _deep_probes.get(file_path)
+    if mtime is not None and cached is not None and cached[0] == mtime:
+        return cached[1]
+    
+    try:
+        # Stop at the first deep channel rather than checking them all
+        has_deep = next((True for c in read_node.channels() if c.startswith(_DEEP_PREFIXES)), False)
+    except:
+        has_deep = False
+    
+    if mtime is not None:
+        _deep_probes[file_path] = (mtime, has_deep)
+    return has_deep
+
 # Advanced VFX functions
 
+@_vfx
 def create_camera_tracker(args):
     """Creates and sets up a CameraTracker node"""
-    try:
-        source_name = args.get('sourceName')
-        tracking_features = args.get('trackingFeatures', {})
-        
-        if not source_name:
-            return {"error": "sourceName is required"}
-        
-        # Get the source node
-        source_node = nuke.toNode(source_name)
-        if not source_node:
-            return {"error": f"Source node '{source_name}' not found"}
+    source_name = args.get('sourceName')
+    tracking_features = args.get('trackingFeatures', {})
+    
+    if not source_name:
+        return {"error": "sourceName is required"}
+    
+    # Get the source node
+    source_node = nuke.toNode(source_name)
+    if not source_node:
+        return {"error": f"Source node '{source_name}' not found"}
+    
+    # Create CameraTracker node
+    camera_tracker = nuke.createNode("CameraTracker")
+    
+    # Connect the source node
+    camera_tracker.setInput(0, source_node)
+    
+    # Set tracking features parameters if provided
+    if tracking_features:
+        number_features = tracking_features.get('numberFeatures')
+        feature_size = tracking_features.get('featureSize')
+        feature_separation = tracking_features.get('featureSeparation')
         
-        # Create CameraTracker node
-        camera_tracker = nuke.createNode("CameraTracker")
+        if number_features is not None:
+            camera_tracker.knob('keyframe_tracks').setValue(number_features)
         
-        # Connect the source node
-        camera_tracker.setInput(0, source_node)
+        if feature_size is not None:
+            camera_tracker.knob('detection_size').setValue(feature_size)
         
-        # Set tracking features parameters if provided
-        if tracking_features:
-            number_features = tracking_features.get('numberFeatures')
-            feature_size = tracking_features.get('featureSize')
-            feature_separation = tracking_features.get('featureSeparation')
-            
-            if number_features is not None:
-                camera_tracker.knob('keyframe_tracks').setValue(number_features)
-            
-            if feature_size is not None:
-                camera_tracker.knob('detection_size').setValue(feature_size)
-            
-            if feature_separation is not None:
-                camera_tracker.knob('detection_spacing').setValue(feature_separation)
-        
-        return {
-            "success": True,
-            "cameraTracker": {
-                "name": camera_tracker.name(),
-                "source": source_name
-            }
+        if feature_separation is not None:
+            camera_tracker.knob('detection_spacing').setValue(feature_separation)
+    
+    return {
+        "success": True,
+        "cameraTracker": {
+            "name": camera_tracker.name(),
+            "source": source_name
         }
-    except Exception as e:
-        return {"error": str(e), "traceback": traceback.format_exc()}
+    }
 
+def _track_count(camera_tracker):
+    """Number of tracks on a CameraTracker, or None if it can't be read"""
+    num_tracks = camera_tracker.knob('numTracks')
+    if num_tracks is not None:
+        return int(num_tracks.value())
+    tracks = camera_tracker.knob('tracks')
+    if tracks is not None and hasattr(tracks, 'getNumRows'):
+        return tracks.getNumRows()
+    return None
+
+@_vfx
 def solve_camera_track(args):
     """Solves a camera track using the specified CameraTracker node"""
-    try:
-        camera_tracker_node = args.get('cameraTrackerNode')
-        solve_method = args.get('solveMethod', "Match-Moving")
-        
-        if not camera_tracker_node:
-            return {"error": "cameraTrackerNode is required"}
-        
-        # Get the CameraTracker node
-        camera_tracker = nuke.toNode(camera_tracker_node)
-        if not camera_tracker:
-            return {"error": f"CameraTracker node '{camera_tracker_node}' not found"}
-        
-        # Check if it's a CameraTracker node
-        if camera_tracker.Class() != "CameraTracker":
-            return {"error": f"Node '{camera_tracker_node}' is not a CameraTracker node"}
-        
-        # Select the node
-        nuke.selectAll()
-        nuke.invertSelection()
-        camera_tracker.setSelected(True)
-        
-        # Set the solve method
-        solve_methods = {
-            "Match-Moving": "matchmoving",
-            "Full": "fullsolution",
-            "Refine": "refine"
-        }
-        
-        # Execute the solve
-        method = solve_methods.get(solve_method, "matchmoving")
-        
-        # Track features before solving
-        nukescripts.cameratracker.createTracks(camera_tracker)
-
-        # Run the appropriate solver based on the method
-        if method == "matchmoving":
-            nukescripts.cameratracker.solveMatchMoving(camera_tracker)
-        elif method == "fullsolution":
-            nukescripts.cameratracker.solveFullSolution(camera_tracker)
-        elif method == "refine":
-            nukescripts.cameratracker.refineSolution(camera_tracker)
-        
-        # Get status
-        error_knob = camera_tracker.knob("solve_error")
-        error_value = error_knob.value() if error_knob else "Unknown"
-        
-        return {
-            "success": True,
-            "cameraTracker": camera_tracker_node,
-            "solveMethod": solve_method,
-            "solveError": error_value
-        }
-    except Exception as e:
-        return {"error": str(e), "traceback": traceback.format_exc()}
+    camera_tracker_node = args.get('cameraTrackerNode')
+    solve_method = args.get('solveMethod', "Match-Moving")
+    min_tracks = args.get('minTracks', MIN_SOLVE_TRACKS)
+    
+    if not camera_tracker_node:
+        return {"error": "cameraTrackerNode is required"}
+    
+    # Get the CameraTracker node
+    camera_tracker = nuke.toNode(camera_tracker_node)
+    if not camera_tracker:
+        return {"error": f"CameraTracker node '{camera_tracker_node}' not found"}
+    
+    # Check if it's a CameraTracker node
+    if camera_tracker.Class() != "CameraTracker":
+        return {"error": f"Node '{camera_tracker_node}' is not a CameraTracker node"}
+    
+    # Select only the node
+    _clear_selection()
+    camera_tracker.setSelected(True)
+    
+    # Execute the solve
+    method = _SOLVE_METHODS.get(solve_method, "matchmoving")
+    
+    # Track features before solving
+    nukescripts.cameratracker.createTracks(camera_tracker)
+    
+    # Too few tracks and the solver only iterates towards nothing
+    track_count = _track_count(camera_tracker)
+    if track_count is not None and track_count < min_tracks:
+        return {"error": f"Insufficient features: {track_count} tracks, at least {min_tracks} needed to solve"}
+    
+    # Run the appropriate solver based on the method
+    if method == "matchmoving":
+        nukescripts.cameratracker.solveMatchMoving(camera_tracker)
+    elif method == "fullsolution":
+        nukescripts.cameratracker.solveFullSolution(camera_tracker)
+    elif method == "refine":
+        nukescripts.cameratracker.refineSolution(camera_tracker)
+    
+    # Get status
+    error_knob = camera_tracker.knob("solve_error")
+    error_value = error_knob.value() if error_knob else "Unknown"
+    
+    return {
+        "success": True,
+        "cameraTracker": camera_tracker_node,
+        "solveMethod": solve_method,
+        "solveError": error_value
+    }
 
+@_vfx
 def create_scene(args):
     """Creates a 3D scene with optional camera and geometry"""
-    try:
-        camera_node = args.get('cameraNode')
-        geometry_nodes = args.get('geometryNodes', [])
-        
-        # Create Scene node
-        scene_node = nuke.createNode("Scene")
-        
+    camera_node = args.get('cameraNode')
+    geometry_nodes = args.get('geometryNodes', [])
+    
+    # Find the camera and every geometry node before creating anything,
+    # so a bad name doesn't leave an orphan Scene or Camera behind
+    camera = None
+    if camera_node:
+        camera = nuke.toNode(camera_node)
+        if not camera:
+            return {"error": f"Camera node '{camera_node}' not found"}
+    
+    resolved = {name: nuke.toNode(name) for name in geometry_nodes}
+    missing = [name for name, node in resolved.items() if not node]
+    if missing:
+        return {"error": _not_found("Geometry node", missing)}
+    
+    with _no_undo():
         # Create Camera node if none provided
-        if camera_node:
-            camera = nuke.toNode(camera_node)
-            if not camera:
-                return {"error": f"Camera node '{camera_node}' not found"}
-        else:
-            camera = nuke.createNode("Camera2")
+        if camera is None:
+            camera = nuke.nodes.Camera2()
             camera_node = camera.name()
         
-        # Connect camera to the scene
-        scene_node.setInput(0, camera)
+        # Create Scene node, with the camera and then the geometry connected
+        scene_node = nuke.nodes.Scene(inputs=[camera, *(resolved[name] for name in geometry_nodes)])
         
-        # Connect geometry nodes if provided
-        for i, geo_name in enumerate(geometry_nodes):
-            geo_node = nuke.toNode(geo_name)
-            if geo_node:
-                scene_node.setInput(i + 1, geo_node)
-            else:
-                return {"error": f"Geometry node '{geo_name}' not found"}
-        
-        # Create ScanlineRender node
-        render_node = nuke.createNode("ScanlineRender")
+        # Create ScanlineRender node; the scene goes on its second (obj/scn) input
+        render_node = nuke.nodes.ScanlineRender()
         render_node.setInput(1, scene_node)
-        
-        return {
-            "success": True,
-            "scene": {
-                "name": scene_node.name(),
-                "camera": camera_node,
-                "geometry": geometry_nodes,
-                "render": render_node.name()
-            }
+    
+    return {
+        "success": True,
+        "scene": {
+            "name": scene_node.name(),
+            "camera": camera_node,
+            "geometry": geometry_nodes,
+            "render": render_node.name()
         }
-    except Exception as e:
-        return {"error": str(e), "traceback": traceback.format_exc()}
+    }
 
+@_vfx
 def setup_deep_pipeline(args):
     """Sets up a Deep compositing pipeline"""
-    try:
-        input_nodes = args.get('inputNodes', [])
-        merge_operation = args.get('mergeOperation', "over")
-        
-        if not input_nodes:
-            return {"error": "inputNodes is required"}
-        
-        # Check if input nodes exist and are valid
-        node_objects = []
-        for node_name in input_nodes:
-            node = nuke.toNode(node_name)
-            if not node:
-                return {"error": f"Node '{node_name}' not found"}
-            node_objects.append(node)
-        
-        # Set up the deep pipeline
-        created_nodes = []
-        deep_nodes = []
+    input_nodes = args.get('inputNodes', [])
+    merge_operation = args.get('mergeOperation', "over")
+    
+    if not input_nodes:
+        return {"error": "inputNodes is required"}
+    
+    # Look every input up once, and report all the missing ones before
+    # creating anything
+    resolved = {name: nuke.toNode(name) for name in input_nodes}
+    missing = [name for name, node in resolved.items() if not node]
+    if missing:
+        return {"error": _not_found("Node", missing)}
+    node_objects = [resolved[name] for name in input_nodes]
+    
+    # Set up the deep pipeline
+    created_nodes = []
+    deep_nodes = []
+    
+    with _no_undo():
+        # Nodes are built with the nuke.nodes factories, which connect their
+        # inputs as they are created and skip createNode's interactive work
+        # (auto-connecting to the selection, placing the node in the DAG)
         
         # Create DeepRead or DeepFromImage nodes for each input
         for i, node in enumerate(node_objects):
             # Determine if we need DeepFromImage or if it's already a deep node
             if node.Class() == "Read":
                 file_path = node.knob('file').value()
-                if file_path.lower().endswith('.exr'):
+                if file_path.endswith(_EXR_SUFFIXES):
                     # Check if the EXR has deep data
-                    try:
-                        channels = node.channels()
-                        has_deep = any(c.startswith('deep.') for c in channels)
-                    except:
-                        has_deep = False
-                    
-                    if has_deep:
+                    if _has_deep_channels(node, file_path):
                         # It's a deep EXR, use DeepRead
-                        deep_node = nuke.createNode("DeepRead")
-                        deep_node.knob('file').setValue(file_path)
+                        deep_node = nuke.nodes.DeepRead(file=file_path)
                     else:
                         # Convert to deep
-                        deep_node = nuke.createNode("DeepFromImage")
-                        deep_node.setInput(0, node)
+                        deep_node = nuke.nodes.DeepFromImage(inputs=[node])
                 else:
                     # Not an EXR, convert to deep
-                    deep_node = nuke.createNode("DeepFromImage")
-                    deep_node.setInput(0, node)
+                    deep_node = nuke.nodes.DeepFromImage(inputs=[node])
             else:
                 # For any other node, assume we need to convert to deep
-                deep_node = nuke.createNode("DeepFromImage")
-                deep_node.setInput(0, node)
+                deep_node = nuke.nodes.DeepFromImage(inputs=[node])
             
             created_nodes.append(deep_node.name())
             deep_nodes.append(deep_node)
         
         # Create DeepMerge node to combine them all
         if len(deep_nodes) > 1:
-            deep_merge = nuke.createNode("DeepMerge")
-            deep_merge.knob('operation').setValue(merge_operation)
-            
-            for i, node in enumerate(deep_nodes):
-                deep_merge.setInput(i, node)
+            deep_merge = nuke.nodes.DeepMerge(operation=merge_operation, inputs=deep_nodes)
             
             created_nodes.append(deep_merge.name())
             
             # Create DeepToImage node to convert back to 2D
-            deep_to_image = nuke.createNode("DeepToImage")
-            deep_to_image.setInput(0, deep_merge)
+            deep_to_image = nuke.nodes.DeepToImage(inputs=[deep_merge])
             
             created_nodes.append(deep_to_image.name())
             final_node = deep_to_image
         else:
             # Only one deep node, convert back to 2D
-            deep_to_image = nuke.createNode("DeepToImage")
-            deep_to_image.setInput(0, deep_nodes[0])
+            deep_to_image = nuke.nodes.DeepToImage(inputs=[deep_nodes[0]])
             
             created_nodes.append(deep_to_image.name())
             final_node = deep_to_image
-        
-        return {
-            "success": True,
-            "deepPipeline": {
-                "inputNodes": input_nodes,
-                "createdNodes": created_nodes,
-                "finalNode": final_node.name(),
-                "operation": merge_operation
-            }
+    
+    return {
+        "success": True,
+        "deepPipeline": {
+            "inputNodes": input_nodes,
+            "createdNodes": created_nodes,
+            "finalNode": final_node.name(),
+            "operation": merge_operation
         }
-    except Exception as e:
-        return {"error": str(e), "traceback": traceback.format_exc()}
+    }
 
-def batch_process(args):
-    """Batch processes a directory of files using Nuke"""
-    try:
-        input_directory = args.get('inputDirectory')
-        output_directory = args.get('outputDirectory')
-        file_pattern = args.get('filePattern', '*')
-        process_script = args.get('processScript')
-        
-        if not input_directory:
-            return {"error": "inputDirectory is required"}
-        if not output_directory:
-            return {"error": "outputDirectory is required"}
-        
-        # Check if directories exist
-        if not os.path.exists(input_directory):
-            return {"error": f"Input directory '{input_directory}' does not exist"}
-        
-        # Create output directory if it doesn't exist
-        if not os.path.exists(output_directory):
-            os.makedirs(output_directory)
-        
-        # Find all files matching the pattern
-        search_pattern = os.path.join(input_directory, file_pattern)
-        files = glob.glob(search_pattern)
-        
-        if not files:
-            return {"error": f"No files found matching pattern '{search_pattern}'"}
-        
-        processed_files = []
-        
-        # Process each file
-        for file_path in files:
-            file_name = os.path.basename(file_path)
-            output_path = os.path.join(output_directory, file_name)
-            
-            # Create a Read node
-            read_node = nuke.createNode("Read")
-            read_node.knob('file').setValue(file_path)
-            
-            # Load process script if provided
-            if process_script and os.path.exists(process_script):
-                nuke.nodePaste(process_script)
-                
-                # Connect the last created node to the Read node
-                for node in nuke.selectedNodes():
-                    if node.Class() != "Read":
-                        node.setInput(0, read_node)
-                
-                # Find a Write node to set the output
-                write_nodes = [n for n in nuke.allNodes() if n.Class() == "Write"]
-                if write_nodes:
-                    write_node = write_nodes[0]
+# Argument that starts this script as a batch_process worker rather than
+# running a single command
+BATCH_WORKER_COMMAND = "batchWorker"
+
+# Compression for the EXRs batch_process writes. Single-scanline ZIP blocks
+# decode about twice as fast as Nuke's default 16-line ZIP in scanline
+# readers such as Nuke itself, and cost nothing extra to write.
+EXR_COMPRESSION = "Zip (1 scanline)"
+
+def _build_batch_graph(process_script):
+    """The Read and Write nodes a batch worker re-points at each file, and
+    whether the Write node was created here rather than by the process script"""
+    # The worker has no DAG to place nodes in, so they are built with the
+    # nuke.nodes factories rather than createNode
+    read_node = nuke.nodes.Read()
+    
+    # Load process script if provided
+    if process_script and os.path.exists(process_script):
+        nuke.nodePaste(process_script)
+        
+        # The pasted nodes are left selected; the worker's script holds
+        # nothing else but the Read node, so they are grouped by class once
+        # here instead of searching nuke.allNodes() for each kind of node
+        nodes_by_class = {}
+        for node in nuke.selectedNodes():
+            nodes_by_class.setdefault(node.Class(), []).append(node)
+        
+        # Connect the last created node to the Read node
+        for node_class, nodes in nodes_by_class.items():
+            if node_class != "Read":
+                for node in nodes:
+                    node.setInput(0, read_node)
+        
+        # Find a Write node to set the output
+        write_nodes = nodes_by_class.get("Write")
+        if write_nodes:
+            return read_node, write_nodes[0], False
+        
+        # Find the last node in the processing chain
+        last_node = next(
+            (node for node_class, nodes in nodes_by_class.items() if node_class != "Read"
+             for node in nodes if node.dependent() == []),
+            None
+        )
+        
+        # Create a Write node if none exists
+        write_node = nuke.nodes.Write(inputs=[last_node if last_node else read_node])
+    else:
+        # No process script, just copy the file
+        write_node = nuke.nodes.Write(inputs=[read_node])
+    
+    return read_node, write_node, True
+
+def _process_one(read_node, write_node, job):
+    """Render one file or image sequence through a batch worker's graph.
+    
+    Only the file knobs are re-pointed, so Nuke keeps its caches for the
+    rest of the graph between files.
+    """
+    read_node.knob('file').setValue(job["input"])
+    write_node.knob('file').setValue(job["output"])
+    
+    # Set for every job, single files included, as the Read node would
+    # otherwise keep the previous sequence's range
+    first, last = job.get("first", 1), job.get("last", 1)
+    for knob in ('first', 'origfirst'):
+        read_node.knob(knob).setValue(first)
+    for knob in ('last', 'origlast'):
+        read_node.knob(knob).setValue(last)
+    
+    # A whole sequence in one execute; a missing or bad frame doesn't stop the rest
+    nuke.execute(write_node, first, last, continueOnError=True)
+
+def _batch_worker(process_script, exr_compression=None):
+    """Serve batch_process jobs until stdin closes.
+    
+    Each job is a line of JSON {"input", "output"} on stdin, with "first" and
+    "last" frames for an image sequence; each result is the job, with an
+    "error" if it failed, as a line of JSON on stdout. The graph is built
+    once and reused for every file, so Nuke starts and the process script is
+    pasted once per worker.
+    """
+    with _no_undo():
+        read_node, write_node, created = _build_batch_graph(process_script)
+    if not exr_compression and created:
+        # A process script's own Write node keeps its compression unless one is asked for
+        exr_compression = EXR_COMPRESSION
+    
+    # The Write node's file type is only touched when the outputs switch
+    # between EXR and anything else, not for every file
+    file_type = write_node.knob('file_type')
+    default_file_type = file_type.value()
+    writing_exr = False
+    
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        job = json.loads(line)
+        result = dict(job)
+        try:
+            exr = bool(exr_compression) and job["output"].endswith(_EXR_SUFFIXES)
+            if exr != writing_exr:
+                if exr:
+                    # The compression knob only exists once the file type is EXR
+                    file_type.setValue('exr')
+                    write_node.knob('compression').setValue(exr_compression)
                 else:
-                    # Create a Write node if none exists
-                    write_node = nuke.createNode("Write")
-                    last_node = None
-                    
-                    # Find the last node in the processing chain
-                    for node in nuke.allNodes():
-                        if node.Class() != "Read" and node.Class() != "Write" and node.dependent() == []:
-                            last_node = node
-                            break
-                    
-                    if last_node:
-                        write_node.setInput(0, last_node)
-                    else:
-                        write_node.setInput(0, read_node)
-                
-                # Set the output path
-                write_node.knob('file').setValue(output_path)
-                
-                # Execute the Write node
-                nuke.execute(write_node, int(read_node.knob('first').value()), int(read_node.knob('last').value()))
-            else:
-                # No process script, just copy the file
-                write_node = nuke.createNode("Write")
-                write_node.setInput(0, read_node)
-                write_node.knob('file').setValue(output_path)
-                
-                # Execute the Write node
-                nuke.execute(write_node, int(read_node.knob('first').value()), int(read_node.knob('last').value()))
+                    file_type.setValue(default_file_type)
+                writing_exr = exr
+            _process_one(read_node, write_node, job)
+        except Exception as e:
+            result["error"] = str(e)
+        _write(result)
+
+def _run_batch_worker(jobs, results, process_script, exr_compression, threads):
+    """Feed jobs from a queue to one worker process, filling in results.
+    
+    Runs on its own thread, one per worker.
+    """
+    worker = subprocess.Popen(
+        [nuke.EXE_PATH, '-m', str(threads), '-t', os.path.abspath(__file__),
+         BATCH_WORKER_COMMAND, process_script or '', exr_compression or ''],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, bufsize=1
+    )
+    try:
+        while True:
+            try:
+                index, job = jobs.get_nowait()
+            except queue.Empty:
+                break
             
-            processed_files.append({
-                "input": file_path,
-                "output": output_path
-            })
+            result = None
+            try:
+                worker.stdin.write(json.dumps(job) + "\n")
+                worker.stdin.flush()
+                # Nuke and this script print their own messages on stdout too;
+                # the result is the first line that is one
+                for line in worker.stdout:
+                    try:
+                        message = json.loads(line)
+                    except ValueError:
+                        continue
+                    if isinstance(message, dict) and message.get("input") == job["input"]:
+                        result = message
+                        break
+            except OSError:
+                pass
             
-            # Clear the script for the next file
-            nuke.scriptClear()
-        
-        return {
-            "success": True,
-            "batchProcess": {
-                "inputDirectory": input_directory,
-                "outputDirectory": output_directory,
-                "filePattern": file_pattern,
-                "processedFiles": processed_files
-            }
-        }
-    except Exception as e:
-        return {"error": str(e), "traceback": traceback.format_exc()}
+            if result is None:
+                # The worker has gone; leave the remaining files to the others
+                results[index] = {**job, "error": "Batch worker exited"}
+                break
+            results[index] = result
+    finally:
+        try:
+            worker.stdin.close()
+        except OSError:
+            pass
+        worker.wait()
+
+# A file name ending in a frame number set off by '.' or '_', as in
+# plate.1001.exr or plate_1001.exr: (prefix, frame, extension)
+_FRAME_NUMBER = re.compile(r'^(.*[._])(\d+)(\.[^.]+)$')
+
+# Extensions of still image formats, the only files grouped into sequences;
+# numbered movies such as shot1.mov and shot2.mov are separate inputs
+_STILL_EXTENSIONS = frozenset((
+    '.exr', '.dpx', '.cin', '.tif', '.tiff', '.png', '.jpg', '.jpeg',
+    '.tga', '.sgi', '.rgb', '.hdr', '.bmp', '.psd'
+))
+
+def _batch_jobs(files, output_directory):
+    """batch_process jobs for a list of files.
+    
+    Still images numbered without gaps and with the same name and padding
+    otherwise, e.g. plate.1001.exr to plate.1100.exr, become one job for the
+    whole printf-style sequence, so they are rendered in one execute call
+    instead of one per frame. Any other file is a job of its own.
+    """
+    jobs = []
+    sequences = {}
+    for file_path in files:
+        directory, name = os.path.split(file_path)
+        match = _FRAME_NUMBER.match(name)
+        if match and match.group(3).lower() in _STILL_EXTENSIONS:
+            prefix, frame, extension = match.groups()
+            key = (directory, prefix, len(frame), extension)
+            sequences.setdefault(key, []).append((int(frame), file_path))
+        else:
+            jobs.append({"input": file_path, "output": os.path.join(output_directory, name)})
+    
+    for (directory, prefix, width, extension), frames in sequences.items():
+        frames.sort()
+        # Files sharing a name and padding (the width is part of the key)
+        # are only a sequence if their frames run without gaps; anything
+        # else is processed file by file
+        if len(frames) == 1 or frames[-1][0] - frames[0][0] != len(frames) - 1:
+            for _, file_path in frames:
+                jobs.append({"input": file_path, "output": os.path.join(output_directory, os.path.basename(file_path))})
+            continue
+        name = f"{prefix}%0{width}d{extension}"
+        jobs.append({
+            "input": os.path.join(directory, name),
+            "output": os.path.join(output_directory, name),
+            "first": frames[0][0],
+            "last": frames[-1][0]
+        })
+    return jobs
 
+def _matching_files(directory, pattern):
+    """Paths of the files in a directory whose names match a glob pattern.
+    
+    One scandir pass, whose entries already know whether they are files,
+    instead of glob stat-ing its way through the directory. Hidden files
+    only match a pattern that starts with a dot, as with glob.
+    """
+    if os.sep in pattern or (os.altsep and os.altsep in pattern):
+        # The pattern reaches into subdirectories
+        return glob.glob(os.path.join(directory, pattern))
+    
+    hidden = pattern.startswith('.')
+    with os.scandir(directory) as entries:
+        return [
+            entry.path for entry in entries
+            if (hidden or not entry.name.startswith('.'))
+            and fnmatch.fnmatch(entry.name, pattern) and entry.is_file()
+        ]
+
+@_vfx
+def batch_process(args):
+    """Batch processes a directory of files using Nuke"""
+    input_directory = args.get('inputDirectory')
+    output_directory = args.get('outputDirectory')
+    file_pattern = args.get('filePattern', '*')
+    process_script = args.get('processScript')
+    workers = args.get('workers')
+    exr_compression = args.get('exrCompression')
+    
+    if not input_directory:
+        return {"error": "inputDirectory is required"}
+    if not output_directory:
+        return {"error": "outputDirectory is required"}
+    
+    # Check if directories exist
+    if not os.path.exists(input_directory):
+        return {"error": f"Input directory '{input_directory}' does not exist"}
+    
+    # Create output directory if it doesn't exist
+    if not os.path.exists(output_directory):
+        os.makedirs(output_directory)
+    
+    # Find all files matching the pattern
+    search_pattern = os.path.join(input_directory, file_pattern)
+    files = _matching_files(input_directory, file_pattern)
+    
+    if not files:
+        return {"error": f"No files found matching pattern '{search_pattern}'"}
+    
+    # Every file or sequence is independent, so they are rendered by a
+    # pool of background Nuke processes, each taking the next job when it
+    # is done. The CPUs are split between the workers, and this session's
+    # script is left alone.
+    batch_jobs = _batch_jobs(files, output_directory)
+    cpus = os.cpu_count() or 1
+    workers = max(1, min(int(workers or cpus), len(batch_jobs)))
+    threads = max(1, cpus // workers)
+    
+    jobs = queue.Queue()
+    for index, job in enumerate(batch_jobs):
+        jobs.put((index, job))
+    results = [None] * len(batch_jobs)
+    
+    feeders = [
+        threading.Thread(target=_run_batch_worker, args=(jobs, results, process_script, exr_compression, threads))
+        for _ in range(workers)
+    ]
+    for feeder in feeders:
+        feeder.start()
+    for feeder in feeders:
+        feeder.join()
+    
+    processed_files = []
+    failed_files = []
+    for job, result in zip(batch_jobs, results):
+        if result is None:
+            # Every worker exited before getting to this job
+            result = {**job, "error": "Batch worker exited"}
+        if "error" in result:
+            failed_files.append(result)
+        else:
+            processed_files.append(job)
+    
+    batch = {
+        "inputDirectory": input_directory,
+        "outputDirectory": output_directory,
+        "filePattern": file_pattern,
+        "processedFiles": processed_files
+    }
+    if failed_files:
+        batch["failedFiles"] = failed_files
+    return {
+        "success": True,
+        "batchProcess": batch
+    }
+
+@_vfx
 def setup_copycat(args):
     """Sets up a CopyCat node for machine learning"""
-    try:
-        training_input_node = args.get('trainingInputNode')
-        training_output_node = args.get('trainingOutputNode')
-        network_type = args.get('networkType', "Basic")
-        
-        if not training_input_node:
-            return {"error": "trainingInputNode is required"}
-        if not training_output_node:
-            return {"error": "trainingOutputNode is required"}
-        
-        # Get the nodes
-        input_node = nuke.toNode(training_input_node)
-        output_node = nuke.toNode(training_output_node)
-        
-        if not input_node:
-            return {"error": f"Input node '{training_input_node}' not found"}
-        if not output_node:
-            return {"error": f"Output node '{training_output_node}' not found"}
-        
-        # Create CopyCat node
-        copycat_node = nuke.createNode("CopyCat")
-        
-        # Connect input and ground truth
-        copycat_node.setInput(0, input_node)
-        copycat_node.setInput(1, output_node)
-        
-        # Set network type
-        network_types = {
-            "Basic": "basic",
-            "UNet": "unet",
-            "Extended": "extended"
-        }
-        copycat_node.knob('networkType').setValue(network_types.get(network_type, "basic"))
-        
-        return {
-            "success": True,
-            "copyCat": {
-                "name": copycat_node.name(),
-                "inputNode": training_input_node,
-                "outputNode": training_output_node,
-                "networkType": network_type
-            }
+    training_input_node = args.get('trainingInputNode')
+    training_output_node = args.get('trainingOutputNode')
+    network_type = args.get('networkType', "Basic")
+    
+    if not training_input_node:
+        return {"error": "trainingInputNode is required"}
+    if not training_output_node:
+        return {"error": "trainingOutputNode is required"}
+    
+    # Get the nodes
+    input_node = nuke.toNode(training_input_node)
+    output_node = nuke.toNode(training_output_node)
+    
+    if not input_node:
+        return {"error": f"Input node '{training_input_node}' not found"}
+    if not output_node:
+        return {"error": f"Output node '{training_output_node}' not found"}
+    
+    # Create CopyCat node
+    copycat_node = nuke.createNode("CopyCat")
+    
+    # Connect input and ground truth
+    copycat_node.setInput(0, input_node)
+    copycat_node.setInput(1, output_node)
+    
+    # Set network type
+    copycat_node.knob('networkType').setValue(_NETWORK_TYPES.get(network_type, "basic"))
+    
+    return {
+        "success": True,
+        "copyCat": {
+            "name": copycat_node.name(),
+            "inputNode": training_input_node,
+            "outputNode": training_output_node,
+            "networkType": network_type
         }
-    except Exception as e:
-        return {"error": str(e), "traceback": traceback.format_exc()}
+    }
 
+@_vfx
 def train_copycat_model(args):
     """Trains a CopyCat neural network model"""
-    try:
-        copycat_node_name = args.get('copyCatNodeName')
-        epochs = args.get('epochs', 100)
-        batch_size = args.get('batchSize', 4)
-        
-        if not copycat_node_name:
-            return {"error": "copyCatNodeName is required"}
-        
-        # Get the CopyCat node
-        copycat_node = nuke.toNode(copycat_node_name)
-        if not copycat_node:
-            return {"error": f"CopyCat node '{copycat_node_name}' not found"}
-        
-        # Check if it's a CopyCat node
-        if copycat_node.Class() != "CopyCat":
-            return {"error": f"Node '{copycat_node_name}' is not a CopyCat node"}
-        
-        # Set training parameters
-        copycat_node.knob('epochs').setValue(epochs)
-        copycat_node.knob('batchSize').setValue(batch_size)
-        
-        # Start training
-        copycat_node.knob('train').execute()
-        
-        # Wait for training to complete (this will block until training is done)
-        # In a real implementation, this should be run in a background thread
-        # to avoid locking up the bridge
-        
-        # Get training results
-        loss = copycat_node.knob('trainingLoss').value()
-        epoch_count = copycat_node.knob('completedEpochs').value()
-        
-        return {
-            "success": True,
-            "copyCatTraining": {
-                "node": copycat_node_name,
-                "completedEpochs": epoch_count,
-                "finalLoss": loss
-            }
+    copycat_node_name = args.get('copyCatNodeName')
+    epochs = args.get('epochs', 100)
+    batch_size = args.get('batchSize', 4)
+    
+    if not copycat_node_name:
+        return {"error": "copyCatNodeName is required"}
+    
+    # Get the CopyCat node
+    copycat_node = nuke.toNode(copycat_node_name)
+    if not copycat_node:
+        return {"error": f"CopyCat node '{copycat_node_name}' not found"}
+    
+    # Check if it's a CopyCat node
+    if copycat_node.Class() != "CopyCat":
+        return {"error": f"Node '{copycat_node_name}' is not a CopyCat node"}
+    
+    # Set training parameters
+    copycat_node.knob('epochs').setValue(epochs)
+    copycat_node.knob('batchSize').setValue(batch_size)
+    
+    # Blocks until training is done
+    copycat_node.knob('train').execute()
+    
+    # Get training results
+    loss = copycat_node.knob('trainingLoss').value()
+    epoch_count = copycat_node.knob('completedEpochs').value()
+    
+    return {
+        "success": True,
+        "copyCatTraining": {
+            "node": copycat_node_name,
+            "completedEpochs": epoch_count,
+            "finalLoss": loss
         }
-    except Exception as e:
-        return {"error": str(e), "traceback": traceback.format_exc()}
+    }
+
+def _merge_input(index):
+    """Merge2 input for the index'th A input: A1 is input 1, but input 2 is
+    the mask, so A2 onwards start at input 3"""
+    return 1 if index == 0 else index + 2
 
+def _merge_all(base, nodes, operation):
+    """A single Merge2 applying every node to base in turn, on its A inputs.
+    
+    Equivalent to a chain of one Merge2 per node, without the extra nodes
+    for Nuke to evaluate.
+    """
+    merge = nuke.nodes.Merge2(operation=operation, inputs=[base])
+    for i, node in enumerate(nodes):
+        merge.setInput(_merge_input(i), node)
+    return merge
+
+@_vfx
 def setup_basic_comp(args):
     """Sets up a basic compositing tree with the provided elements"""
-    try:
-        plate_node = args.get('plateNode')
-        fg_elements = args.get('fgElements', [])
-        bg_elements = args.get('bgElements', [])
-        
-        if not plate_node:
-            return {"error": "plateNode is required"}
-        
-        # Get the plate node
-        plate = nuke.toNode(plate_node)
-        if not plate:
-            return {"error": f"Plate node '{plate_node}' not found"}
-        
-        created_nodes = []
-        
+    plate_node = args.get('plateNode')
+    fg_elements = args.get('fgElements', [])
+    bg_elements = args.get('bgElements', [])
+    
+    if not plate_node:
+        return {"error": "plateNode is required"}
+    
+    # Get the plate node
+    plate = nuke.toNode(plate_node)
+    if not plate:
+        return {"error": f"Plate node '{plate_node}' not found"}
+    
+    # Look every element up once, and before creating anything, so a bad
+    # name doesn't leave half a comp behind
+    elements = {name: nuke.toNode(name) for name in (*bg_elements, *fg_elements)}
+    missing_bg = [name for name in bg_elements if not elements[name]]
+    if missing_bg:
+        return {"error": _not_found("Background node", missing_bg)}
+    missing_fg = [name for name in fg_elements if not elements[name]]
+    if missing_fg:
+        return {"error": _not_found("Foreground node", missing_fg)}
+    
+    created_nodes = []
+    
+    with _no_undo():
         # Process background elements
         bg_merge = None
         if bg_elements:
-            # Create a merge node for background elements
-            bg_merge = nuke.createNode("Merge2")
-            bg_merge.knob('operation').setValue('under')
-            bg_merge.setInput(0, plate)
+            # One merge for all the background elements, stacked under the plate
+            bg_merge = _merge_all(plate, [elements[name] for name in bg_elements], 'under')
             created_nodes.append(bg_merge.name())
-            
-            last_node = bg_merge
-            
-            # Connect background elements in sequence
-            for i, bg_name in enumerate(bg_elements):
-                bg_node = nuke.toNode(bg_name)
-                if not bg_node:
-                    return {"error": f"Background node '{bg_name}' not found"}
-                
-                if i == 0:
-                    bg_merge.setInput(1, bg_node)
-                else:
-                    new_merge = nuke.createNode("Merge2")
-                    new_merge.knob('operation').setValue('under')
-                    new_merge.setInput(0, last_node)
-                    new_merge.setInput(1, bg_node)
-                    created_nodes.append(new_merge.name())
-                    last_node = new_merge
         
         # Process foreground elements
         fg_merge = None
@@ -502,61 +762,45 @@ def setup_basic_comp(args):
             # Determine what node to use as the base
             base_node = bg_merge if bg_merge else plate
             
-            # Create a merge node for foreground elements
-            fg_merge = nuke.createNode("Merge2")
-            fg_merge.knob('operation').setValue('over')
-            fg_merge.setInput(0, base_node)
+            # One merge for all the foreground elements, stacked over the base
+            fg_merge = _merge_all(base_node, [elements[name] for name in fg_elements], 'over')
             created_nodes.append(fg_merge.name())
-            
-            last_node = fg_merge
-            
-            # Connect foreground elements in sequence
-            for i, fg_name in enumerate(fg_elements):
-                fg_node = nuke.toNode(fg_name)
-                if not fg_node:
-                    return {"error": f"Foreground node '{fg_name}' not found"}
-                
-                if i == 0:
-                    fg_merge.setInput(1, fg_node)
-                else:
-                    new_merge = nuke.createNode("Merge2")
-                    new_merge.knob('operation').setValue('over')
-                    new_merge.setInput(0, last_node)
-                    new_merge.setInput(1, fg_node)
-                    created_nodes.append(new_merge.name())
-                    last_node = new_merge
-        
-        # Determine the final node
-        final_node = fg_merge if fg_merge else (bg_merge if bg_merge else plate)
-        
-        return {
-            "success": True,
-            "basicComp": {
-                "plateNode": plate_node,
-                "fgElements": fg_elements,
-                "bgElements": bg_elements,
-                "createdNodes": created_nodes,
-                "finalNode": final_node.name()
-            }
+    
+    # Determine the final node
+    final_node = fg_merge if fg_merge else (bg_merge if bg_merge else plate)
+    
+    return {
+        "success": True,
+        "basicComp": {
+            "plateNode": plate_node,
+            "fgElements": fg_elements,
+            "bgElements": bg_elements,
+            "createdNodes": created_nodes,
+            "finalNode": final_node.name()
         }
-    except Exception as e:
-        return {"error": str(e), "traceback": traceback.format_exc()}
+    }
 
+def _hex_color(color):
+    """'#rrggbb' for the first three components of a 0-1 float colour"""
+    # Clamped, as components outside 0-1 have no 8-bit hex form, and rounded
+    return '#' + bytes(int(max(0.0, min(1.0, c)) * 255 + 0.5) for c in color[:3]).hex()
+
+@_vfx
 def setup_keyer(args):
     """Sets up a keying pipeline for the input node"""
-    try:
-        input_node_name = args.get('inputNodeName')
-        keyer_type = args.get('keyerType', "Primatte")
-        screen_color = args.get('screenColor')
-        
-        if not input_node_name:
-            return {"error": "inputNodeName is required"}
-        
-        # Get the input node
-        input_node = nuke.toNode(input_node_name)
-        if not input_node:
-            return {"error": f"Input node '{input_node_name}' not found"}
-        
+    input_node_name = args.get('inputNodeName')
+    keyer_type = args.get('keyerType', "Primatte")
+    screen_color = args.get('screenColor')
+    
+    if not input_node_name:
+        return {"error": "inputNodeName is required"}
+    
+    # Get the input node
+    input_node = nuke.toNode(input_node_name)
+    if not input_node:
+        return {"error": f"Input node '{input_node_name}' not found"}
+    
+    with _no_undo():
         # Create the appropriate keyer node
         keyer_node = None
         
@@ -598,11 +842,7 @@ def setup_keyer(args):
             
             if screen_color:
                 if len(screen_color) >= 3:
-                    color_hex = '#{:02x}{:02x}{:02x}'.format(
-                        int(screen_color[0] * 255),
-                        int(screen_color[1] * 255),
-                        int(screen_color[2] * 255)
-                    )
+                    color_hex = _hex_color(screen_color)
                     keyer_node.knob('screenColour').setValue(color_hex)
         
         elif keyer_type == "UltraKeyer":
@@ -624,70 +864,97 @@ def setup_keyer(args):
         edge_blur = nuke.createNode("EdgeBlur")
         edge_blur.setInput(0, premult)
         edge_blur.knob('size').setValue(2)
-        
-        return {
-            "success": True,
-            "keyer": {
-                "inputNode": input_node_name,
-                "keyerType": keyer_type,
-                "keyerNode": keyer_node.name(),
-                "finalNode": edge_blur.name()
-            }
+    
+    return {
+        "success": True,
+        "keyer": {
+            "inputNode": input_node_name,
+            "keyerType": keyer_type,
+            "keyerNode": keyer_node.name(),
+            "finalNode": edge_blur.name()
         }
-    except Exception as e:
-        return {"error": str(e), "traceback": traceback.format_exc()}
+    }
+
+# VectorGenerator created by setup_motion_blur for each source, as
+# {source node name: VectorGenerator node name}
+_vector_generators = {}
+
+def _vector_generator_for(source):
+    """The VectorGenerator setup_motion_blur made for a source, if it is still in use"""
+    name = _vector_generators.get(source.name())
+    if name is None:
+        return None
+    
+    node = nuke.toNode(name)
+    # Nuke hands out a new Python object for a node on every lookup, so
+    # inputs are compared by name
+    vector_input = node.input(0) if node is not None else None
+    if vector_input is None or node.Class() != "VectorGenerator" or vector_input.name() != source.name():
+        # Deleted, renamed away or rewired since; make a new one
+        del _vector_generators[source.name()]
+        return None
+    return node
+
+try:
+    # The names mean nothing in the next script
+    nuke.addOnScriptClose(_vector_generators.clear)
+except Exception:
+    pass
 
+@_vfx
 def setup_motion_blur(args):
     """Sets up motion blur for the input node"""
-    try:
-        input_node_name = args.get('inputNodeName')
-        vector_node_name = args.get('vectorNodeName')
-        motion_blur_samples = args.get('motionBlurSamples', 10)
-        
-        if not input_node_name:
-            return {"error": "inputNodeName is required"}
-        
-        # Get the input node
-        input_node = nuke.toNode(input_node_name)
-        if not input_node:
-            return {"error": f"Input node '{input_node_name}' not found"}
-        
-        created_nodes = []
-        
-        # Set up motion vectors if not provided
-        if vector_node_name:
-            vector_node = nuke.toNode(vector_node_name)
-            if not vector_node:
-                return {"error": f"Vector node '{vector_node_name}' not found"}
-        else:
+    input_node_name = args.get('inputNodeName')
+    vector_node_name = args.get('vectorNodeName')
+    motion_blur_samples = args.get('motionBlurSamples', 10)
+    
+    if not input_node_name:
+        return {"error": "inputNodeName is required"}
+    
+    # Get the input node
+    input_node = nuke.toNode(input_node_name)
+    if not input_node:
+        return {"error": f"Input node '{input_node_name}' not found"}
+    
+    created_nodes = []
+    
+    # Set up motion vectors if not provided
+    if vector_node_name:
+        vector_node = nuke.toNode(vector_node_name)
+        if not vector_node:
+            return {"error": f"Vector node '{vector_node_name}' not found"}
+    else:
+        # Motion vectors are expensive to generate, so a source blurred
+        # more than once (e.g. its RGB and its matte) shares one generator
+        vector_node = _vector_generator_for(input_node)
+        if vector_node is None:
             # Create VectorGenerator node
             vector_node = nuke.createNode("VectorGenerator")
             vector_node.setInput(0, input_node)
-            vector_node_name = vector_node.name()
-            created_nodes.append(vector_node_name)
-        
-        # Create MotionBlur node
-        motion_blur = nuke.createNode("MotionBlur")
-        motion_blur.setInput(0, input_node)
-        motion_blur.setInput(1, vector_node)
-        motion_blur.knob('samples').setValue(motion_blur_samples)
-        created_nodes.append(motion_blur.name())
-        
-        return {
-            "success": True,
-            "motionBlur": {
-                "inputNode": input_node_name,
-                "vectorNode": vector_node_name,
-                "samples": motion_blur_samples,
-                "createdNodes": created_nodes,
-                "finalNode": motion_blur.name()
-            }
+            created_nodes.append(vector_node.name())
+            _vector_generators[input_node_name] = vector_node.name()
+        vector_node_name = vector_node.name()
+    
+    # Create MotionBlur node
+    motion_blur = nuke.createNode("MotionBlur")
+    motion_blur.setInput(0, input_node)
+    motion_blur.setInput(1, vector_node)
+    motion_blur.knob('samples').setValue(motion_blur_samples)
+    created_nodes.append(motion_blur.name())
+    
+    return {
+        "success": True,
+        "motionBlur": {
+            "inputNode": input_node_name,
+            "vectorNode": vector_node_name,
+            "samples": motion_blur_samples,
+            "createdNodes": created_nodes,
+            "finalNode": motion_blur.name()
         }
-    except Exception as e:
-        return {"error": str(e), "traceback": traceback.format_exc()}
+    }
 
-# Map commands to functions
-vfx_functions = {
+# Map commands to functions. Fixed once the module is loaded, so exposed read-only.
+vfx_functions = types.MappingProxyType({
     "createCameraTracker": create_camera_tracker,
     "solveCameraTrack": solve_camera_track,
     "createScene": create_scene,
@@ -698,33 +965,16 @@ vfx_functions = {
     "setupBasicComp": setup_basic_comp,
     "setupKeyer": setup_keyer,
     "setupMotionBlur": setup_motion_blur
-}
+})
 
 def main():
     """Main entry point for the VFX bridge script"""
-    if len(sys.argv) < 2:
-        print(json.dumps({"error": "No command specified"}))
+    # Started by batch_process to render files in the background
+    if len(sys.argv) > 1 and sys.argv[1] == BATCH_WORKER_COMMAND:
+        _batch_worker(*sys.argv[2:4])
         return
     
-    command = sys.argv[1]
-    
-    # Parse arguments
-    args = {}
-    if len(sys.argv) > 2:
-        try:
-            args = json.loads(sys.argv[2])
-        except json.JSONDecodeError:
-            print(json.dumps({"error": "Invalid JSON arguments"}))
-            return
-    
-    # Execute the appropriate command
-    if command in vfx_functions:
-        result = vfx_functions[command](args)
-    else:
-        result = {"error": f"Unknown VFX command: {command}"}
-    
-    # Print the result as JSON
-    print(json.dumps(result))
+    run(vfx_functions)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
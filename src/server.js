@@ -24,39 +24,77 @@ const server = new McpServer({
   description: "MCP server for interacting with Nuke"
 });
 
+// Every message on the wire is a 4-byte big-endian payload length and a
+// 1-byte payload format (0 = JSON), followed by the payload
+const FRAME_HEADER_SIZE = 5;
+const FORMAT_JSON = 0;
+
 // Helper function to send commands to the foundry_nuke_bridge
 async function sendToNuke(command) {
   return new Promise((resolve, reject) => {
     const client = new net.Socket();
-    let data = '';
+    const chunks = [];
+    let received = 0;
+    let done = false;
+
+    const finish = (response) => {
+      done = true;
+      resolve(response);
+      client.destroy();
+    };
 
     client.connect(BRIDGE_PORT, BRIDGE_HOST, () => {
-      client.write(JSON.stringify(command));
+      const payload = Buffer.from(JSON.stringify(command), 'utf8');
+      const header = Buffer.alloc(FRAME_HEADER_SIZE);
+      header.writeUInt32BE(payload.length, 0);
+      header.writeUInt8(FORMAT_JSON, 4);
+      client.write(Buffer.concat([header, payload]));
     });
 
     client.on('data', (chunk) => {
-      data += chunk;
-    });
+      chunks.push(chunk);
+      received += chunk.length;
+      if (received < FRAME_HEADER_SIZE) {
+        return;
+      }
 
-    client.on('end', () => {
+      // Wait until the whole response frame has arrived
+      const data = Buffer.concat(chunks, received);
+      const size = data.readUInt32BE(0);
+      if (received < FRAME_HEADER_SIZE + size) {
+        return;
+      }
+
+      const text = data.toString('utf8', FRAME_HEADER_SIZE, FRAME_HEADER_SIZE + size);
       try {
-        const result = JSON.parse(data);
-        resolve({
+        const result = JSON.parse(text);
+        finish({
           content: [{ 
             type: "text", 
             text: JSON.stringify(result, null, 2) 
           }]
         });
       } catch (e) {
-        resolve({
+        finish({
           content: [{ 
             type: "text", 
-            text: `Error parsing response: ${data}` 
+            text: `Error parsing response: ${text}` 
+          }],
+          isError: true
+        });
+      }
+    });
+
+    client.on('end', () => {
+      if (!done) {
+        finish({
+          content: [{ 
+            type: "text", 
+            text: "Connection closed before a complete response was received" 
           }],
           isError: true
         });
       }
-      client.destroy();
     });
 
     client.on('error', (err) => {
@@ -110,12 +148,13 @@ server.tool(
 server.tool(
   "getNode",
   {
-    nodeName: z.string().describe("Name of the node to get information about")
+    nodeName: z.string().describe("Name of the node to get information about"),
+    knobs: z.array(z.string()).optional().describe("Names of the knobs to return (e.g., ['file']). Pass this when only a few are needed; all visible knobs are returned otherwise")
   },
-  async ({ nodeName }) => {
+  async ({ nodeName, knobs }) => {
     return await sendToNuke({
       type: 'getNode',
-      args: { nodeName }
+      args: { nodeName, knobs }
     });
   },
   { description: "Gets information about a node" }
@@ -135,7 +174,38 @@ server.tool(
       args: { writeNodeName, frameRangeStart, frameRangeEnd }
     });
   },
-  { description: "Renders frames using a Write node" }
+  { description: "Starts rendering frames using a Write node in a background Nuke process; returns a jobId" }
+);
+
+// Render Status tool
+server.tool(
+  "renderStatus",
+  {
+    jobId: z.string().describe("Job id returned by execute")
+  },
+  async ({ jobId }) => {
+    return await sendToNuke({
+      type: 'renderStatus',
+      args: { jobId }
+    });
+  },
+  { description: "Reports whether a render started by execute is still running" }
+);
+
+// Render Wait tool
+server.tool(
+  "renderWait",
+  {
+    jobId: z.string().describe("Job id returned by execute"),
+    timeout: z.number().optional().describe("Seconds to wait at most (waits until the render finishes if omitted)")
+  },
+  async ({ jobId, timeout }) => {
+    return await sendToNuke({
+      type: 'renderWait',
+      args: { jobId, timeout }
+    });
+  },
+  { description: "Waits for a render started by execute to finish" }
 );
 
 // Node Graph Management Tools
@@ -289,12 +359,13 @@ server.tool(
   "solveCameraTrack",
   {
     cameraTrackerNode: z.string().describe("Name of the CameraTracker node"),
-    solveMethod: z.enum(["Match-Moving", "Full", "Refine"]).optional().describe("Solve method (default is 'Match-Moving')")
+    solveMethod: z.enum(["Match-Moving", "Full", "Refine"]).optional().describe("Solve method (default is 'Match-Moving')"),
+    minTracks: z.number().optional().describe("Fewest tracks to attempt a solve with (default is 20)")
   },
-  async ({ cameraTrackerNode, solveMethod = "Match-Moving" }) => {
+  async ({ cameraTrackerNode, solveMethod = "Match-Moving", minTracks }) => {
     return await sendToNuke({
       type: 'solveCameraTrack',
-      args: { cameraTrackerNode, solveMethod }
+      args: { cameraTrackerNode, solveMethod, minTracks }
     });
   },
   { description: "Solves a camera track using the specified CameraTracker node" }
@@ -343,12 +414,14 @@ server.tool(
     inputDirectory: z.string().describe("Directory containing input files"),
     outputDirectory: z.string().describe("Directory for output files"),
     filePattern: z.string().optional().describe("File pattern to match (e.g., '*.exr')"),
-    processScript: z.string().optional().describe("Optional path to a Nuke script to process the files")
+    processScript: z.string().optional().describe("Optional path to a Nuke script to process the files"),
+    workers: z.number().int().positive().optional().describe("Number of Nuke processes rendering files in parallel (defaults to one per CPU)"),
+    exrCompression: z.string().optional().describe("Compression for EXR output, as labelled on the Write node (defaults to 'Zip (1 scanline)')")
   },
-  async ({ inputDirectory, outputDirectory, filePattern, processScript }) => {
+  async ({ inputDirectory, outputDirectory, filePattern, processScript, workers, exrCompression }) => {
     return await sendToNuke({
       type: 'batchProcess',
-      args: { inputDirectory, outputDirectory, filePattern, processScript }
+      args: { inputDirectory, outputDirectory, filePattern, processScript, workers, exrCompression }
     });
   },
   { description: "Batch processes a directory of files using Nuke" }
@@ -520,15 +593,34 @@ server.tool(
 server.tool(
   "listNodes",
   {
-    filter: z.string().optional().describe("Optional filter to narrow down the list of nodes (e.g., 'Read')")
+    filter: z.string().optional().describe("Optional filter to narrow down the list of nodes (e.g., 'Read')"),
+    columns: z.boolean().optional().describe("Return parallel names/types/xs/ys lists instead of one object per node; more compact for large scripts")
   },
-  async ({ filter }) => {
+  async ({ filter, columns }) => {
     return await sendToNuke({
       type: 'listNodes',
-      args: { filter }
+      args: { filter, columns }
     });
   },
   { description: "Lists all nodes in the current script, optionally filtered by type" }
 );
 
+// Batch tool
+server.tool(
+  "batch",
+  {
+    ops: z.array(z.object({
+      command: z.string().describe("Name of the command to run (e.g., 'createNode')"),
+      args: z.record(z.any()).optional().describe("Arguments for the command")
+    })).describe("Commands to run in order")
+  },
+  async ({ ops }) => {
+    return await sendToNuke({
+      type: 'batch',
+      args: { ops }
+    });
+  },
+  { description: "Runs several node graph commands in one request, without recording undo steps" }
+);
+
 export { server };